@@ -1,12 +1,27 @@
+import os
 from fastapi import APIRouter, HTTPException, Depends
 from app.database import get_cursor
-from datetime import date
+from app.cache import LRUCache
+from datetime import date, timedelta
 from app.auth.utils import get_current_user
+from app.audit.audit import audit
 
 router = APIRouter()
 
 VALID_STATUSES = ["BOOKED", "CONFIRMED", "COMPLETED", "CANCELLED", "NO_SHOW"]
 
+# series occurrences that can still be moved or cancelled
+OPEN_STATUSES = ["BOOKED", "CONFIRMED"]
+SERIES_MAX_OCCURRENCES = 104
+
+# hot typeahead prefixes, per worker and keyed by location; the directory
+# itself is kept current by triggers, so new customers show up within the TTL
+search_cache = LRUCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "60"))
+)
+SEARCH_MAX_RESULTS = 20
+
 # ---------------- ROLE CHECK HELPERS ----------------
 def allow_roles(current_user: dict, allowed_roles: list):
     if current_user["role"] not in allowed_roles:
@@ -23,10 +38,12 @@ def create_appointment(
     service_id: int,
     appointment_date: str,
     appointment_time: str,
+    customer_email: str = None,
     current_user: dict = Depends(get_current_user)
 ):
     # 🔐 CUSTOMER or ADMIN
     allow_roles(current_user, ["CUSTOMER", "ADMIN"])
+    location_id = current_user["location_id"]
 
     conn, cur = get_cursor()
 
@@ -40,8 +57,11 @@ def create_appointment(
 
     # check staff exists
     cur.execute(
-        "SELECT id FROM staff WHERE id = %s AND is_active = TRUE",
-        (staff_id,)
+        """
+        SELECT id FROM staff
+        WHERE location_id = %s AND id = %s AND is_active = TRUE
+        """,
+        (location_id, staff_id)
     )
     if not cur.fetchone():
         conn.close()
@@ -49,8 +69,11 @@ def create_appointment(
 
     # check service exists
     cur.execute(
-        "SELECT id FROM services WHERE id = %s AND is_active = TRUE",
-        (service_id,)
+        """
+        SELECT id FROM services
+        WHERE location_id = %s AND id = %s AND is_active = TRUE
+        """,
+        (location_id, service_id)
     )
     if not cur.fetchone():
         conn.close()
@@ -60,63 +83,465 @@ def create_appointment(
     cur.execute(
         """
         INSERT INTO appointments
-        (customer_name, staff_id, service_id, appointment_date, appointment_time)
-        VALUES (%s, %s, %s, %s, %s)
+        (customer_name, staff_id, service_id, appointment_date,
+         appointment_time, customer_email, location_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
         """,
-        (customer_name, staff_id, service_id, appointment_date, appointment_time)
+        (customer_name, staff_id, service_id, appointment_date,
+         appointment_time, customer_email, location_id)
     )
+    appointment_id = cur.fetchone()["id"]
 
     conn.commit()
     conn.close()
+
+    audit(current_user, "CREATE", "appointment", appointment_id, {
+        "customer_name": customer_name,
+        "staff_id": staff_id,
+        "service_id": service_id,
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time
+    })
     return {"message": "Appointment booked successfully"}
 
-# ---------------- READ ----------------
-@router.get("/")
-def get_all_appointments(
+# ---------------- RECURRING SERIES HELPERS ----------------
+def parse_date(value: str, field: str):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{field} must be a date in YYYY-MM-DD format"
+        )
+
+def count_occurrences(start_date: date, end_date: date, interval_weeks: int):
+    return (end_date - start_date).days // (7 * interval_weeks) + 1
+
+def expand_occurrences(start_date: date, end_date: date, interval_weeks: int):
+    step = timedelta(weeks=interval_weeks)
+    dates = []
+    current = start_date
+    while current <= end_date:
+        dates.append(current)
+        current += step
+    return dates
+
+def find_conflicts(
+    cur,
+    location_id: int,
+    dates: list,
+    staff_id: int,
+    appointment_time: str,
+    duration_minutes: int,
+    exclude_series_id: int = None
+):
+    """Return {date: appointment_id} for occurrences that overlap existing
+    appointments of the same staff member, using a single range query."""
+    if not dates:
+        return {}
+
+    cur.execute(
+        """
+        SELECT DISTINCT ON (a.appointment_date)
+               a.appointment_date, a.id
+        FROM appointments a
+        JOIN services sv ON sv.id = a.service_id
+        WHERE a.location_id = %(location_id)s
+          AND a.staff_id = %(staff_id)s
+          AND a.appointment_date BETWEEN %(first)s AND %(last)s
+          AND a.appointment_date = ANY(%(dates)s::date[])
+          AND a.status <> 'CANCELLED'
+          AND a.series_id IS DISTINCT FROM %(series_id)s::int
+          AND a.appointment_time
+              < %(time)s::time + make_interval(mins => %(duration)s)
+          AND %(time)s::time
+              < a.appointment_time + make_interval(mins => sv.duration_minutes)
+        ORDER BY a.appointment_date, a.appointment_time
+        """,
+        {
+            "location_id": location_id,
+            "staff_id": staff_id,
+            "first": min(dates),
+            "last": max(dates),
+            "dates": dates,
+            "series_id": exclude_series_id,
+            "time": appointment_time,
+            "duration": duration_minutes
+        }
+    )
+    return {row["appointment_date"]: row["id"] for row in cur.fetchall()}
+
+def get_service_duration(cur, location_id: int, service_id: int):
+    cur.execute(
+        """
+        SELECT duration_minutes FROM services
+        WHERE location_id = %s AND id = %s AND is_active = TRUE
+        """,
+        (location_id, service_id)
+    )
+    service = cur.fetchone()
+    return service["duration_minutes"] if service else None
+
+# ---------------- CREATE (RECURRING SERIES) ----------------
+@router.post("/series")
+def create_appointment_series(
+    customer_name: str,
+    staff_id: int,
+    service_id: int,
+    start_date: str,
+    end_date: str,
+    appointment_time: str,
+    interval_weeks: int,
+    customer_email: str = None,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 CUSTOMER or ADMIN
+    allow_roles(current_user, ["CUSTOMER", "ADMIN"])
+
+    first = parse_date(start_date, "start_date")
+    last = parse_date(end_date, "end_date")
+
+    if first < date.today():
+        raise HTTPException(
+            status_code=400,
+            detail="Appointment date cannot be in the past"
+        )
+
+    if interval_weeks < 1 or last < first:
+        raise HTTPException(
+            status_code=400,
+            detail="interval_weeks must be positive and end_date after start_date"
+        )
+
+    # check the size before building the list of dates
+    if count_occurrences(first, last, interval_weeks) > SERIES_MAX_OCCURRENCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A series cannot have more than {SERIES_MAX_OCCURRENCES} occurrences"
+        )
+    dates = expand_occurrences(first, last, interval_weeks)
+
+    location_id = current_user["location_id"]
+    conn, cur = get_cursor()
+
+    # check staff exists
+    cur.execute(
+        """
+        SELECT id FROM staff
+        WHERE location_id = %s AND id = %s AND is_active = TRUE
+        """,
+        (location_id, staff_id)
+    )
+    if not cur.fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    # check service exists
+    duration_minutes = get_service_duration(cur, location_id, service_id)
+    if duration_minutes is None:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    conflicts = find_conflicts(
+        cur, location_id, dates, staff_id, appointment_time, duration_minutes
+    )
+    free_dates = [d for d in dates if d not in conflicts]
+
+    if not free_dates:
+        conn.close()
+        raise HTTPException(
+            status_code=409,
+            detail="Every occurrence conflicts with an existing appointment"
+        )
+
+    cur.execute(
+        """
+        INSERT INTO appointment_series
+        (customer_name, staff_id, service_id, appointment_time,
+         interval_weeks, start_date, end_date, location_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+        """,
+        (customer_name, staff_id, service_id, appointment_time,
+         interval_weeks, first, last, location_id)
+    )
+    series_id = cur.fetchone()["id"]
+
+    # insert every free occurrence in one statement
+    cur.execute(
+        """
+        INSERT INTO appointments
+        (customer_name, staff_id, service_id, appointment_date,
+         appointment_time, series_id, customer_email, location_id)
+        SELECT %s, %s, %s, day, %s, %s, %s, %s
+        FROM unnest(%s::date[]) AS day
+        """,
+        (customer_name, staff_id, service_id, appointment_time,
+         series_id, customer_email, location_id, free_dates)
+    )
+
+    conn.commit()
+    conn.close()
+
+    audit(current_user, "CREATE", "appointment_series", series_id, {
+        "booked": free_dates,
+        "conflicts": list(conflicts)
+    })
+    return {
+        "message": "Appointment series booked successfully",
+        "series_id": series_id,
+        "booked": free_dates,
+        "conflicts": [
+            {"appointment_date": d, "conflicting_appointment_id": appt_id}
+            for d, appt_id in sorted(conflicts.items())
+        ]
+    }
+
+# ---------------- UPDATE (THIS AND FOLLOWING) ----------------
+@router.put("/series/{series_id}")
+def update_appointment_series(
+    series_id: int,
+    from_date: str,
+    staff_id: int = None,
+    service_id: int = None,
+    appointment_time: str = None,
     current_user: dict = Depends(get_current_user)
 ):
     # 🔐 ADMIN or STAFF
     allow_roles(current_user, ["ADMIN", "STAFF"])
 
+    if staff_id is None and service_id is None and appointment_time is None:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one field must be provided"
+        )
+
+    split_date = parse_date(from_date, "from_date")
+
+    location_id = current_user["location_id"]
     conn, cur = get_cursor()
+    cur.execute(
+        "SELECT * FROM appointment_series WHERE location_id = %s AND id = %s",
+        (location_id, series_id)
+    )
+    series = cur.fetchone()
+    if not series:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Series not found")
+
+    staff_id = staff_id if staff_id is not None else series["staff_id"]
+    service_id = service_id if service_id is not None else series["service_id"]
+    appointment_time = appointment_time or str(series["appointment_time"])
+
     cur.execute(
         """
-        SELECT a.*, s.name AS staff_name, sv.name AS service_name
-        FROM appointments a
-        JOIN staff s ON a.staff_id = s.id
-        JOIN services sv ON a.service_id = sv.id
-        ORDER BY a.appointment_date, a.appointment_time
+        SELECT id FROM staff
+        WHERE location_id = %s AND id = %s AND is_active = TRUE
+        """,
+        (location_id, staff_id)
+    )
+    if not cur.fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    duration_minutes = get_service_duration(cur, location_id, service_id)
+    if duration_minutes is None:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    cur.execute(
         """
+        SELECT appointment_date FROM appointments
+        WHERE series_id = %s
+          AND appointment_date >= %s
+          AND status = ANY(%s)
+        """,
+        (series_id, split_date, OPEN_STATUSES)
     )
-    data = cur.fetchall()
+    dates = [row["appointment_date"] for row in cur.fetchall()]
+    if not dates:
+        conn.close()
+        raise HTTPException(
+            status_code=404,
+            detail="No open occurrences on or after from_date"
+        )
+
+    conflicts = find_conflicts(
+        cur, location_id, dates, staff_id, appointment_time, duration_minutes,
+        exclude_series_id=series_id
+    )
+    if conflicts:
+        conn.close()
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Some occurrences conflict with existing appointments",
+                "conflicts": [
+                    {"appointment_date": str(d), "conflicting_appointment_id": appt_id}
+                    for d, appt_id in sorted(conflicts.items())
+                ]
+            }
+        )
+
+    # editing from a later occurrence splits the series in two
+    target_series_id = series_id
+    if split_date > series["start_date"]:
+        cur.execute(
+            """
+            INSERT INTO appointment_series
+            (customer_name, staff_id, service_id, appointment_time,
+             interval_weeks, start_date, end_date, location_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+            """,
+            (series["customer_name"], staff_id, service_id, appointment_time,
+             series["interval_weeks"], split_date, series["end_date"],
+             location_id)
+        )
+        target_series_id = cur.fetchone()["id"]
+        cur.execute(
+            "UPDATE appointment_series SET end_date = %s WHERE id = %s",
+            (split_date - timedelta(days=1), series_id)
+        )
+    else:
+        cur.execute(
+            """
+            UPDATE appointment_series
+            SET staff_id = %s, service_id = %s, appointment_time = %s
+            WHERE id = %s
+            """,
+            (staff_id, service_id, appointment_time, series_id)
+        )
+
+    cur.execute(
+        """
+        UPDATE appointments
+        SET staff_id = %s,
+            service_id = %s,
+            appointment_time = %s,
+            series_id = %s
+        WHERE series_id = %s
+          AND appointment_date >= %s
+          AND status = ANY(%s)
+        """,
+        (staff_id, service_id, appointment_time, target_series_id,
+         series_id, split_date, OPEN_STATUSES)
+    )
+    updated = cur.rowcount
+
+    conn.commit()
     conn.close()
-    return data
 
-@router.get("/{appointment_id}")
-def get_appointment_by_id(
-    appointment_id: int,
+    audit(current_user, "UPDATE", "appointment_series", series_id, {
+        "from_date": from_date,
+        "staff_id": staff_id,
+        "service_id": service_id,
+        "appointment_time": appointment_time,
+        "series_id": target_series_id
+    })
+    return {
+        "message": "Appointment series updated successfully",
+        "series_id": target_series_id,
+        "updated": updated
+    }
+
+# ---------------- CANCEL (THIS AND FOLLOWING) ----------------
+@router.delete("/series/{series_id}")
+def cancel_appointment_series(
+    series_id: int,
+    from_date: str,
     current_user: dict = Depends(get_current_user)
 ):
     # 🔐 ADMIN or STAFF
     allow_roles(current_user, ["ADMIN", "STAFF"])
 
+    split_date = parse_date(from_date, "from_date")
+
     conn, cur = get_cursor()
     cur.execute(
-        "SELECT * FROM appointments WHERE id = %s",
-        (appointment_id,)
+        """
+        SELECT start_date FROM appointment_series
+        WHERE location_id = %s AND id = %s
+        """,
+        (current_user["location_id"], series_id)
     )
-    appt = cur.fetchone()
+    series = cur.fetchone()
+    if not series:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Series not found")
+
+    # cancelling from the first occurrence cancels the whole series;
+    # otherwise the series now ends the day before from_date
+    if split_date <= series["start_date"]:
+        cur.execute(
+            "UPDATE appointment_series SET status = 'CANCELLED' WHERE id = %s",
+            (series_id,)
+        )
+    else:
+        cur.execute(
+            """
+            UPDATE appointment_series
+            SET end_date = LEAST(end_date, %s)
+            WHERE id = %s
+            """,
+            (split_date - timedelta(days=1), series_id)
+        )
+
+    cur.execute(
+        """
+        UPDATE appointments
+        SET status = 'CANCELLED'
+        WHERE series_id = %s
+          AND appointment_date >= %s
+          AND status = ANY(%s)
+        """,
+        (series_id, split_date, OPEN_STATUSES)
+    )
+    cancelled = cur.rowcount
+
+    conn.commit()
     conn.close()
 
-    if not appt:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    audit(current_user, "CANCEL", "appointment_series", series_id, {
+        "from_date": from_date,
+        "cancelled": cancelled
+    })
+    return {
+        "message": "Appointment series cancelled successfully",
+        "cancelled": cancelled
+    }
 
-    return appt
+# ---------------- READ ----------------
+@router.get("/")
+def get_all_appointments(
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 ADMIN or STAFF
+    allow_roles(current_user, ["ADMIN", "STAFF"])
+
+    conn, cur = get_cursor()
+    cur.execute(
+        """
+        SELECT a.*, s.name AS staff_name, sv.name AS service_name
+        FROM appointments a
+        JOIN staff s ON a.staff_id = s.id
+        JOIN services sv ON a.service_id = sv.id
+        WHERE a.location_id = %s
+        ORDER BY a.appointment_date, a.appointment_time
+        """,
+        (current_user["location_id"],)
+    )
+    data = cur.fetchall()
+    conn.close()
+    return data
 
 # ---------------- FILTER ----------------
 @router.get("/filter")
 def filter_appointments(
     appointment_date: str = None,
+    date_from: str = None,
+    date_to: str = None,
     staff_id: int = None,
     status: str = None,
     current_user: dict = Depends(get_current_user)
@@ -131,14 +556,23 @@ def filter_appointments(
         FROM appointments a
         JOIN staff s ON a.staff_id = s.id
         JOIN services sv ON a.service_id = sv.id
-        WHERE 1=1
+        WHERE a.location_id = %s
     """
-    values = []
+    values = [current_user["location_id"]]
 
     if appointment_date:
         query += " AND a.appointment_date = %s"
         values.append(appointment_date)
 
+    # date bounds let postgres prune appointment partitions
+    if date_from:
+        query += " AND a.appointment_date >= %s"
+        values.append(date_from)
+
+    if date_to:
+        query += " AND a.appointment_date <= %s"
+        values.append(date_to)
+
     if staff_id:
         query += " AND a.staff_id = %s"
         values.append(staff_id)
@@ -160,6 +594,91 @@ def filter_appointments(
     conn.close()
     return data
 
+# ---------------- CUSTOMER TYPEAHEAD ----------------
+@router.get("/search")
+def search_customers(
+    q: str,
+    limit: int = 10,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 ADMIN or STAFF
+    allow_roles(current_user, ["ADMIN", "STAFF"])
+
+    term = q.strip()
+    if not term:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+
+    key = (current_user["location_id"], term.lower(), limit)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    escaped = (
+        term.lower()
+        .replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+    # prefix matches first, then fuzzy (trigram) matches by similarity
+    conn, cur = get_cursor()
+    cur.execute(
+        """
+        SELECT d.customer_name,
+               d.visits,
+               d.last_appointment_id,
+               d.last_appointment_date,
+               d.last_appointment_time,
+               d.last_status,
+               sv.name AS last_service_name,
+               d.preferred_staff_id,
+               s.name AS preferred_staff_name
+        FROM customer_directory d
+        LEFT JOIN staff s ON s.id = d.preferred_staff_id
+        LEFT JOIN services sv ON sv.id = d.last_service_id
+        WHERE d.location_id = %(location_id)s
+          AND (lower(d.customer_name) LIKE %(prefix)s
+               OR d.customer_name %% %(term)s)
+        ORDER BY lower(d.customer_name) LIKE %(prefix)s DESC,
+                 similarity(d.customer_name, %(term)s) DESC,
+                 d.last_appointment_date DESC
+        LIMIT %(limit)s
+        """,
+        {
+            "location_id": current_user["location_id"],
+            "prefix": escaped + "%",
+            "term": term,
+            "limit": limit
+        }
+    )
+    data = cur.fetchall()
+    conn.close()
+
+    search_cache.set(key, data)
+    return data
+
+@router.get("/{appointment_id}")
+def get_appointment_by_id(
+    appointment_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 ADMIN or STAFF
+    allow_roles(current_user, ["ADMIN", "STAFF"])
+
+    conn, cur = get_cursor()
+    cur.execute(
+        "SELECT * FROM appointments WHERE location_id = %s AND id = %s",
+        (current_user["location_id"], appointment_id)
+    )
+    appt = cur.fetchone()
+    conn.close()
+
+    if not appt:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+
+    return appt
+
 # ---------------- UPDATE (PUT) ----------------
 @router.put("/{appointment_id}")
 def update_appointment(
@@ -185,9 +704,10 @@ def update_appointment(
         SET appointment_date = %s,
             appointment_time = %s,
             status = %s
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
         """,
-        (appointment_date, appointment_time, status, appointment_id)
+        (appointment_date, appointment_time, status,
+         current_user["location_id"], appointment_id)
     )
 
     if cur.rowcount == 0:
@@ -196,6 +716,12 @@ def update_appointment(
 
     conn.commit()
     conn.close()
+
+    audit(current_user, "UPDATE", "appointment", appointment_id, {
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time,
+        "status": status
+    })
     return {"message": "Appointment updated successfully"}
 
 # ---------------- PARTIAL UPDATE (PATCH) ----------------
@@ -219,9 +745,9 @@ def patch_appointment(
         """
         UPDATE appointments
         SET status = %s
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
         """,
-        (status, appointment_id)
+        (status, current_user["location_id"], appointment_id)
     )
 
     if cur.rowcount == 0:
@@ -230,6 +756,8 @@ def patch_appointment(
 
     conn.commit()
     conn.close()
+
+    audit(current_user, "PATCH", "appointment", appointment_id, {"status": status})
     return {"message": "Appointment status updated"}
 
 # ---------------- DELETE ----------------
@@ -243,8 +771,8 @@ def delete_appointment(
 
     conn, cur = get_cursor()
     cur.execute(
-        "DELETE FROM appointments WHERE id = %s",
-        (appointment_id,)
+        "DELETE FROM appointments WHERE location_id = %s AND id = %s",
+        (current_user["location_id"], appointment_id)
     )
 
     if cur.rowcount == 0:
@@ -253,4 +781,6 @@ def delete_appointment(
 
     conn.commit()
     conn.close()
+
+    audit(current_user, "DELETE", "appointment", appointment_id)
     return {"message": "Appointment deleted successfully"}
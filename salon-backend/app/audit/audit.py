@@ -0,0 +1,152 @@
+import os
+import json
+import queue
+import logging
+import threading
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from psycopg2.extras import execute_values
+
+from app.database import get_connection
+from app.auth.utils import get_current_user, check_global_admin_permission
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+
+# ---------------- WRITE-BEHIND WRITER ----------------
+class AuditWriter:
+    """Buffers audit events in a bounded queue and writes them in batches.
+
+    Routers only pay for a non-blocking queue put; a background thread
+    flushes every `flush_interval` seconds or once `batch_size` events are
+    waiting. When the queue is full new events are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL
+    ):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, event: tuple):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the writer thread after draining everything queued."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def metrics(self):
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval
+        }
+
+    def _next_batch(self):
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        conn = None
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                if conn is None or conn.closed:
+                    conn = get_connection()
+                self._flush(conn, batch)
+                self.written += len(batch)
+            except Exception:
+                logger.exception("Failed to write %d audit events", len(batch))
+                self.failed += len(batch)
+                if conn is not None:
+                    conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def _flush(self, conn, batch: list):
+        cur = conn.cursor()
+        execute_values(
+            cur,
+            """
+            INSERT INTO audit_log
+            (occurred_at, user_id, location_id, action, entity, entity_id, detail)
+            VALUES %s
+            """,
+            batch,
+            page_size=self.batch_size
+        )
+        conn.commit()
+
+writer = AuditWriter()
+
+def audit(
+    current_user: dict,
+    action: str,
+    entity: str,
+    entity_id: int = None,
+    detail: dict = None
+):
+    """Queue an audit event for a committed change."""
+    current_user = current_user or {}
+    writer.record((
+        datetime.utcnow(),
+        current_user.get("user_id"),
+        current_user.get("location_id"),
+        action,
+        entity,
+        entity_id,
+        json.dumps(detail, default=str) if detail is not None else None
+    ))
+
+# ---------------- METRICS ----------------
+@router.get("/metrics")
+def audit_metrics(
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 main branch admin only; the writer serves every branch
+    check_global_admin_permission(current_user)
+
+    return writer.metrics()
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from app.database import get_cursor
 from jose import jwt, JWTError
@@ -17,6 +18,14 @@ SECRET_KEY = "CHANGE_THIS_SECRET_KEY"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# tokens issued before multi-location support belong to the main branch
+DEFAULT_LOCATION_ID = 1
+
+VALID_ROLES = ["ADMIN", "STAFF", "CUSTOMER"]
+
+# registration is open to customers; staff and admins are added by an admin
+optional_security = HTTPBearer(auto_error=False)
+
 # ---------------- PASSWORD UTILS ----------------
 def validate_password(password: str):
     if len(password) < 8 or len(password) > 20:
@@ -46,10 +55,36 @@ def register_user(
     name: str,
     email: str,
     password: str,
-    role: str
+    role: str,
+    location_id: int = DEFAULT_LOCATION_ID,
+    credentials: HTTPAuthorizationCredentials = Depends(optional_security)
 ):
     validate_password(password)
 
+    if role not in VALID_ROLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid role. Use {VALID_ROLES}"
+        )
+
+    # imported here because app.auth.utils imports this module
+    from app.auth.utils import get_current_user
+    creator = get_current_user(credentials) if credentials else None
+
+    # 🔐 STAFF and ADMIN accounts need an admin of that branch (or of the
+    # main branch, which administers every branch)
+    if role != "CUSTOMER":
+        if creator is None or creator["role"] != "ADMIN":
+            raise HTTPException(
+                status_code=403,
+                detail="Only admin can create staff or admin accounts"
+            )
+        if creator["location_id"] not in (DEFAULT_LOCATION_ID, location_id):
+            raise HTTPException(
+                status_code=403,
+                detail="Admins can only create accounts for their own location"
+            )
+
     conn, cur = get_cursor()
 
     cur.execute(
@@ -63,17 +98,35 @@ def register_user(
             detail="Email already registered"
         )
 
+    cur.execute(
+        "SELECT id FROM locations WHERE id = %s AND is_active = TRUE",
+        (location_id,)
+    )
+    if not cur.fetchone():
+        conn.close()
+        raise HTTPException(status_code=404, detail="Location not found")
+
     cur.execute(
         """
-        INSERT INTO users (name, email, password, role)
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO users (name, email, password, role, location_id)
+        VALUES (%s, %s, %s, %s, %s)
+        RETURNING id
         """,
-        (name, email, hash_password(password), role)
+        (name, email, hash_password(password), role, location_id)
     )
+    user_id = cur.fetchone()["id"]
 
     conn.commit()
     conn.close()
 
+    # imported here because app.audit imports this module via auth.utils
+    from app.audit.audit import audit
+    actor = creator or {"user_id": user_id, "location_id": location_id}
+    audit(actor, "CREATE", "user", user_id, {
+        "email": email,
+        "role": role
+    })
+
     return {"message": "User registered successfully"}
 
 # ---------------- LOGIN ----------------
@@ -83,7 +136,7 @@ def login_user(email: str, password: str):
 
     cur.execute(
         """
-        SELECT id, password, role
+        SELECT id, password, role, location_id
         FROM users
         WHERE email = %s
         """,
@@ -100,7 +153,8 @@ def login_user(email: str, password: str):
 
     access_token = create_access_token({
         "user_id": user["id"],
-        "role": user["role"]
+        "role": user["role"],
+        "location_id": user["location_id"]
     })
 
     return {
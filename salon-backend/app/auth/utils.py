@@ -1,20 +1,49 @@
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from app.auth.auth import SECRET_KEY, ALGORITHM
+from app.auth.auth import SECRET_KEY, ALGORITHM, DEFAULT_LOCATION_ID
+from app.cache import LRUCache
 
 security = HTTPBearer()
 
+# decoded tokens, so repeat requests skip signature verification
+token_cache = LRUCache(maxsize=4096, ttl=60)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload  # { user_id, role }
-    except JWTError:
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or expired token"
+            )
+        payload.setdefault("location_id", DEFAULT_LOCATION_ID)
+        token_cache.set(token, payload)
+    elif payload["exp"] < time.time():
+        token_cache.delete(token)
         raise HTTPException(
             status_code=401,
             detail="Invalid or expired token"
         )
+
+    return dict(payload)  # { user_id, role, location_id }
+
+# ---------------- GLOBAL ADMIN CHECK ----------------
+def check_global_admin_permission(current_user: dict):
+    """ADMINs of the main branch administer every branch: partitions,
+    locations, and the per-worker metrics."""
+    if (
+        current_user["role"] != "ADMIN"
+        or current_user["location_id"] != DEFAULT_LOCATION_ID
+    ):
+        raise HTTPException(
+            status_code=403,
+            detail="Only a main branch admin can perform this action"
+        )
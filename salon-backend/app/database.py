@@ -1,20 +1,113 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 import os
+from contextvars import ContextVar
 
 load_dotenv()
 
+# counts queries per request for the load benchmarks; off in production
+DB_QUERY_STATS = os.getenv("DB_QUERY_STATS", "false").lower() == "true"
+query_counter = ContextVar("query_counter", default=None)
+# pooled connections handed out during the current request
+request_connections = ContextVar("request_connections", default=None)
+
+# per-worker pool size; app.serve divides DB_MAX_CONNECTIONS between workers.
+# putconn() only keeps DB_POOL_MIN connections idle and closes the rest, so
+# the two default to the same size to avoid reconnecting under load
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", str(DB_POOL_MAX)))
+
+_pool = None
+
+class CountingCursor(RealDictCursor):
+    def execute(self, query, vars=None):
+        counter = query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+        return super().execute(query, vars)
+
+class PooledConnection(connection):
+    """Returns itself to the worker pool on close(), so routers keep
+    calling conn.close() whether or not a pool is running."""
+
+    returned = False
+    # identifies the current checkout; a new one is issued by get_cursor()
+    lease = None
+
+    def close(self):
+        # once returned, close() comes from the pool itself and is real
+        if _pool is not None and not self.closed and not self.returned:
+            self.returned = True
+            self.lease = None
+            _pool.putconn(self)
+        else:
+            super().close()
+
+def connection_kwargs():
+    return {
+        "host": os.getenv("DB_HOST"),
+        "port": os.getenv("DB_PORT"),
+        "database": os.getenv("DB_NAME"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "cursor_factory": CountingCursor if DB_QUERY_STATS else RealDictCursor
+    }
+
 def get_connection():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        cursor_factory=RealDictCursor
-    )
+    return psycopg2.connect(**connection_kwargs())
 
 def get_cursor():
-    conn = get_connection()
+    if _pool is None:
+        conn = get_connection()
+    else:
+        conn = _pool.getconn()
+        conn.returned = False
+        conn.lease = object()
+        tracked = request_connections.get()
+        if tracked is not None:
+            tracked.append((conn, conn.lease))
     return conn, conn.cursor()
+
+def release_connections(tracked: list):
+    """Return connections a request left open, e.g. when it raised before
+    reaching conn.close(); the pool rolls back their open transactions.
+
+    A connection the request already closed may have been checked out again
+    by another request, so only leases that are still this request's are
+    released.
+    """
+    for conn, lease in tracked:
+        if conn.lease is lease and not conn.returned:
+            conn.close()
+
+# ---------------- POOL LIFECYCLE ----------------
+def init_pool(minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX):
+    """Open the worker's pool and pre-connect `minconn` connections."""
+    global _pool
+    pool = ThreadedConnectionPool(
+        minconn,
+        maxconn,
+        connection_factory=PooledConnection,
+        **connection_kwargs()
+    )
+    # run a round trip on the idle connections so the first requests
+    # don't pay for authentication and catalog lookups
+    warm = [pool.getconn() for _ in range(minconn)]
+    for conn in warm:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+    for conn in warm:
+        pool.putconn(conn)
+    _pool = pool
+    return maxconn
+
+def close_pool():
+    """Close every pooled connection; call once requests have drained."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None and not pool.closed:
+        pool.closeall()
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from app.database import get_cursor
+from app.auth.utils import get_current_user, check_global_admin_permission
+from app.audit.audit import audit
+
+router = APIRouter()
+
+# ---------------- CREATE ----------------
+@router.post("/")
+def create_location(
+    name: str,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 main branch admin only
+    check_global_admin_permission(current_user)
+
+    conn, cur = get_cursor()
+    cur.execute(
+        "INSERT INTO locations (name) VALUES (%s) RETURNING id",
+        (name,)
+    )
+    location_id = cur.fetchone()["id"]
+    conn.commit()
+    conn.close()
+
+    audit(current_user, "CREATE", "location", location_id, {"name": name})
+    return {"message": "Location created successfully", "id": location_id}
+
+# ---------------- READ ----------------
+@router.get("/")
+def get_all_locations():
+    conn, cur = get_cursor()
+    cur.execute(
+        "SELECT * FROM locations WHERE is_active = TRUE ORDER BY id"
+    )
+    data = cur.fetchall()
+    conn.close()
+    return data
@@ -1,22 +1,125 @@
-from fastapi import FastAPI
-from app.database import get_cursor
-from app.staff.staff import router as staff_router
-from app.services.services import router as services_router
+import time
+BOOT_STARTED = time.perf_counter()
+
+import os
+import logging
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from psycopg2.pool import PoolError
+from app.database import (
+    get_cursor,
+    init_pool,
+    close_pool,
+    release_connections,
+    request_connections,
+    DB_QUERY_STATS,
+    query_counter
+)
+from app.staff.staff import router as staff_router, list_active_staff
+from app.services.services import (
+    router as services_router,
+    list_active_services
+)
 from app.appointments.appointments import router as appointments_router
 from app.reports.reports import router as reports_router
 from app.auth.auth import router as auth_router
-app = FastAPI(title="Salon Management System")
+from app.maintenance.maintenance import (
+    router as maintenance_router,
+    ensure_partitions
+)
+from app.audit.audit import router as audit_router, writer as audit_writer
+from app.reminders.reminders import router as reminders_router
+from app.locations.locations import router as locations_router
+from app.auth.auth import create_access_token, SECRET_KEY, ALGORITHM
+from jose import jwt
+
+logger = logging.getLogger("uvicorn.error")
+
+# ---------------- STARTUP WARM-UP ----------------
+def warm_catalog():
+    conn, cur = get_cursor()
+    cur.execute("SELECT id FROM locations WHERE is_active = TRUE")
+    location_ids = [row["id"] for row in cur.fetchall()]
+    conn.close()
+    for location_id in location_ids:
+        list_active_staff(location_id)
+        list_active_services(location_id)
+
+def create_upcoming_partitions():
+    # bookings beyond the last partition land in appointments_default
+    conn, cur = get_cursor()
+    try:
+        created = ensure_partitions(cur)
+        conn.commit()
+    except Exception:
+        logger.exception("Could not create upcoming appointment partitions")
+        created = []
+    finally:
+        conn.close()
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+
+def warm_auth():
+    # first encode/decode initialises the JWT backend
+    token = create_access_token({"user_id": 0, "role": "WARMUP"})
+    jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool_size = init_pool()
+    # request threads never outnumber pooled connections
+    to_thread.current_default_thread_limiter().total_tokens = pool_size
+    await to_thread.run_sync(create_upcoming_partitions)
+    await to_thread.run_sync(warm_catalog)
+    warm_auth()
+    audit_writer.start()
+
+    app.state.startup_seconds = round(time.perf_counter() - BOOT_STARTED, 3)
+    logger.info(
+        "Worker %d ready in %.3fs (pool of %d connections)",
+        os.getpid(), app.state.startup_seconds, pool_size
+    )
+    yield
+    # uvicorn has let in-flight requests finish by the time we get here
+    audit_writer.stop()
+    close_pool()
+
+app = FastAPI(title="Salon Management System", lifespan=lifespan)
+
+@app.middleware("http")
+async def return_pooled_connections(request: Request, call_next):
+    tracked = []
+    token = request_connections.set(tracked)
+    try:
+        return await call_next(request)
+    finally:
+        request_connections.reset(token)
+        release_connections(tracked)
+
+@app.exception_handler(PoolError)
+async def pool_exhausted(request: Request, exc: PoolError):
+    # every pooled connection is checked out; ask the client to back off
+    logger.warning("Connection pool exhausted: %s", exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
 
 @app.get("/")
 def health_check():
     return {
         "status": "ok",
-        "message": "Salon Management System API is running"
+        "message": "Salon Management System API is running",
+        "startup_seconds": getattr(app.state, "startup_seconds", None)
     }
 
 
 
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
+app.include_router(locations_router, prefix="/locations", tags=["Locations"])
 app.include_router(staff_router, prefix="/staff", tags=["Staff"])
 app.include_router(services_router, prefix="/services", tags=["Services"])
 app.include_router(
@@ -29,6 +132,17 @@ app.include_router(
     prefix="/reports",
     tags=["Reports"]
 )
+app.include_router(
+    maintenance_router,
+    prefix="/maintenance",
+    tags=["Maintenance"]
+)
+app.include_router(audit_router, prefix="/audit", tags=["Audit"])
+app.include_router(
+    reminders_router,
+    prefix="/reminders",
+    tags=["Reminders"]
+)
 
 @app.get("/db-health")
 def db_health_check():
@@ -39,3 +153,32 @@ def db_health_check():
         return {"database": "connected"}
     except Exception as e:
         return {"database": "error", "detail": str(e)}
+
+# ---------------- QUERY STATS (BENCHMARKS ONLY) ----------------
+if DB_QUERY_STATS:
+    query_stats = {}
+
+    @app.middleware("http")
+    async def count_queries(request: Request, call_next):
+        counter = [0]
+        token = query_counter.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            query_counter.reset(token)
+
+        route = request.scope.get("route")
+        key = f"{request.method} {route.path if route else request.url.path}"
+        stats = query_stats.setdefault(key, {"requests": 0, "queries": 0})
+        stats["requests"] += 1
+        stats["queries"] += counter[0]
+        return response
+
+    @app.get("/debug/query-stats")
+    def get_query_stats():
+        return query_stats
+
+    @app.delete("/debug/query-stats")
+    def reset_query_stats():
+        query_stats.clear()
+        return {"message": "Query stats reset"}
@@ -0,0 +1,253 @@
+"""Partition and archive housekeeping for appointments.
+
+Every worker creates missing partitions PARTITION_MONTHS_AHEAD months ahead
+when it starts (see app.main). The archive and a top-up for long-running
+deployments run from cron, e.g. nightly:
+
+    0 3 * * * cd /srv/salon-backend && python -m app.maintenance.maintenance
+"""
+import os
+import re
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Depends
+from psycopg2 import sql
+
+from app.database import get_cursor
+from app.auth.utils import get_current_user, check_global_admin_permission
+from app.audit.audit import audit
+
+router = APIRouter()
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "24"))
+ARCHIVE_TABLESPACE = os.getenv("ARCHIVE_TABLESPACE")
+
+PARTITION_NAME = re.compile(r"^appointments_p(\d{4})(\d{2})$")
+# advisory lock key so workers starting together don't race on CREATE TABLE
+PARTITION_LOCK_ID = 7_260_001
+
+# ---------------- MONTH HELPERS ----------------
+def add_months(month_start: date, months: int):
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month_start: date):
+    return f"appointments_p{month_start:%Y%m}"
+
+def list_partitions(cur):
+    """Return {month_start: name} for the attached monthly partitions."""
+    cur.execute(
+        """
+        SELECT c.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'appointments'::regclass
+        """
+    )
+    partitions = {}
+    for row in cur.fetchall():
+        match = PARTITION_NAME.match(row["name"])
+        if match:
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            partitions[month] = row["name"]
+    return partitions
+
+# ---------------- CREATE PARTITIONS AHEAD ----------------
+def create_partition(cur, month_start: date):
+    """Create and attach the partition for one month.
+
+    Rows that already landed in the default partition for that month are
+    moved into it before it is attached.
+    """
+    month_end = add_months(month_start, 1)
+    name = sql.Identifier(partition_name(month_start))
+
+    cur.execute(
+        sql.SQL(
+            "CREATE TABLE {} (LIKE appointments "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ).format(name)
+    )
+    cur.execute(
+        sql.SQL(
+            """
+            WITH moved AS (
+                DELETE FROM appointments_default
+                WHERE appointment_date >= %s AND appointment_date < %s
+                RETURNING *
+            )
+            INSERT INTO {} SELECT * FROM moved
+            """
+        ).format(name),
+        (month_start, month_end)
+    )
+    cur.execute(
+        sql.SQL(
+            "ALTER TABLE appointments ATTACH PARTITION {} "
+            "FOR VALUES FROM (%s) TO (%s)"
+        ).format(name),
+        (month_start, month_end)
+    )
+    return partition_name(month_start)
+
+def ensure_partitions(
+    cur,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    months_back: int = 0,
+    today: date = None
+):
+    """Create missing monthly partitions from `months_back` months before
+    `today` (the real date by default) up to `months_ahead` months after.
+
+    Holds an advisory lock until the caller's transaction ends, so
+    concurrent callers see each other's partitions.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (PARTITION_LOCK_ID,))
+    existing = list_partitions(cur)
+    this_month = (today or date.today()).replace(day=1)
+    created = []
+
+    for offset in range(-months_back, months_ahead + 1):
+        month_start = add_months(this_month, offset)
+        if month_start not in existing:
+            created.append(create_partition(cur, month_start))
+
+    return created
+
+# ---------------- ARCHIVE OLD PARTITIONS ----------------
+def archive_partitions(cur, months_to_keep: int = ARCHIVE_AFTER_MONTHS):
+    """Roll up and detach partitions older than `months_to_keep` months.
+
+    Daily counts are written to appointment_rollups so reports keep working
+    through the appointment_counts view; the detached table is moved to the
+    archive schema (and ARCHIVE_TABLESPACE when configured).
+    """
+    cutoff = add_months(date.today().replace(day=1), -months_to_keep)
+    archived = []
+
+    for month_start, name in sorted(list_partitions(cur).items()):
+        if month_start >= cutoff:
+            continue
+
+        table = sql.Identifier(name)
+        cur.execute(
+            sql.SQL(
+                """
+                INSERT INTO appointment_rollups
+                (location_id, appointment_date, staff_id, service_id, status,
+                 total_appointments)
+                SELECT location_id, appointment_date, staff_id, service_id,
+                       status, COUNT(*)
+                FROM {}
+                GROUP BY location_id, appointment_date, staff_id, service_id,
+                         status
+                ON CONFLICT
+                (location_id, appointment_date, staff_id, service_id, status)
+                DO UPDATE SET total_appointments = EXCLUDED.total_appointments
+                """
+            ).format(table)
+        )
+        cur.execute(
+            sql.SQL("ALTER TABLE appointments DETACH PARTITION {}").format(table)
+        )
+        cur.execute(
+            sql.SQL("ALTER TABLE {} SET SCHEMA archive").format(table)
+        )
+        if ARCHIVE_TABLESPACE:
+            cur.execute(
+                sql.SQL("ALTER TABLE {} SET TABLESPACE {}").format(
+                    sql.Identifier("archive", name),
+                    sql.Identifier(ARCHIVE_TABLESPACE)
+                )
+            )
+        archived.append(name)
+
+    return archived
+
+# ---------------- CUSTOMER DIRECTORY ----------------
+def refresh_customer_directory(cur):
+    """Recompute every typeahead directory row.
+
+    Triggers on appointments keep the directory current; a full pass is
+    only needed after archiving partitions or loading rows with the
+    triggers disabled.
+    """
+    cur.execute(
+        """
+        SELECT refresh_customer_directory_rows(
+            array_agg(location_id), array_agg(customer_name::text)
+        )
+        FROM (
+            SELECT location_id, customer_name FROM appointments
+            UNION
+            SELECT location_id, customer_name FROM customer_directory
+        ) k
+        """
+    )
+
+# ---------------- ENDPOINTS ----------------
+@router.post("/partitions")
+def create_partitions(
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 main branch admin only
+    check_global_admin_permission(current_user)
+
+    conn, cur = get_cursor()
+    created = ensure_partitions(cur, months_ahead)
+    conn.commit()
+    conn.close()
+
+    audit(current_user, "CREATE", "partition", detail={"created": created})
+    return {"created": created}
+
+@router.post("/archive")
+def archive_old_partitions(
+    months_to_keep: int = ARCHIVE_AFTER_MONTHS,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 main branch admin only
+    check_global_admin_permission(current_user)
+
+    if months_to_keep < 1:
+        raise HTTPException(
+            status_code=400,
+            detail="months_to_keep must be at least 1"
+        )
+
+    conn, cur = get_cursor()
+    archived = archive_partitions(cur, months_to_keep)
+    # drop directory rows that pointed into the detached partitions
+    if archived:
+        refresh_customer_directory(cur)
+    conn.commit()
+    conn.close()
+
+    audit(current_user, "ARCHIVE", "partition", detail={"archived": archived})
+    return {"archived": archived}
+
+@router.post("/customer-directory")
+def refresh_directory(
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 main branch admin only
+    check_global_admin_permission(current_user)
+
+    conn, cur = get_cursor()
+    refresh_customer_directory(cur)
+    conn.commit()
+    conn.close()
+
+    audit(current_user, "REFRESH", "customer_directory")
+    return {"message": "Customer directory refreshed"}
+
+# ---------------- CRON ENTRY POINT ----------------
+if __name__ == "__main__":
+    conn, cur = get_cursor()
+    print("created:", ensure_partitions(cur))
+    print("archived:", archive_partitions(cur))
+    refresh_customer_directory(cur)
+    conn.commit()
+    conn.close()
@@ -0,0 +1,389 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import date, timedelta
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.database import get_cursor
+from app.auth.utils import get_current_user, check_global_admin_permission
+from app.audit.audit import audit
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+REMINDER_CONCURRENCY = int(os.getenv("REMINDER_CONCURRENCY", "20"))
+REMINDER_MAX_RETRIES = int(os.getenv("REMINDER_MAX_RETRIES", "3"))
+REMINDER_RETRY_DELAY = float(os.getenv("REMINDER_RETRY_DELAY", "1.0"))
+# a SENDING claim older than this belongs to a run that died; take it over
+REMINDER_CLAIM_TIMEOUT = int(os.getenv("REMINDER_CLAIM_TIMEOUT", "900"))
+# messages sent between settling; each settle also renews the run's claims
+REMINDER_SETTLE_BATCH = int(os.getenv("REMINDER_SETTLE_BATCH", "200"))
+
+metrics = {
+    "runs": 0,
+    "sent": 0,
+    "failed": 0,
+    "rejected": 0,
+    "retries": 0,
+    "last_run_due": 0,
+    "last_run_seconds": 0.0,
+    "last_run_per_second": 0.0
+}
+
+# ---------------- ADMIN ROLE CHECK ----------------
+def check_admin_permission(current_user: dict):
+    if current_user["role"] != "ADMIN":
+        raise HTTPException(
+            status_code=403,
+            detail="Only admin can perform this action"
+        )
+
+# ---------------- SELECT + CLAIM ----------------
+def claim_due_reminders(
+    cur,
+    appointment_date: date,
+    transport_name: str,
+    claim_token: str,
+    location_id: int = None
+):
+    """Claim every unsent reminder for `appointment_date` in one statement.
+
+    The insert into reminder_deliveries doubles as the dedup record: rows
+    already sent or rejected, or claimed by a live run, are skipped. FAILED
+    rows and claims not renewed for REMINDER_CLAIM_TIMEOUT are taken over.
+    Claimed rows carry `claim_token`. Without a `location_id` every branch
+    is covered.
+    """
+    cur.execute(
+        """
+        WITH due AS (
+            SELECT a.id, a.appointment_date
+            FROM appointments a
+            WHERE a.appointment_date = %(day)s
+              AND (%(location_id)s::int IS NULL
+                   OR a.location_id = %(location_id)s)
+              AND a.status IN ('BOOKED', 'CONFIRMED')
+              AND a.customer_email IS NOT NULL
+        ),
+        claimed AS (
+            INSERT INTO reminder_deliveries
+            (appointment_id, appointment_date, transport, claim_token)
+            SELECT id, appointment_date, %(transport)s, %(token)s::uuid
+            FROM due
+            ON CONFLICT (appointment_id, appointment_date) DO UPDATE
+            SET transport = EXCLUDED.transport,
+                claim_token = EXCLUDED.claim_token,
+                status = 'SENDING',
+                claimed_at = NOW()
+            WHERE reminder_deliveries.status = 'FAILED'
+               OR (reminder_deliveries.status = 'SENDING'
+                   AND reminder_deliveries.claimed_at
+                       < NOW() - make_interval(secs => %(timeout)s))
+            RETURNING appointment_id
+        )
+        SELECT a.id,
+               a.customer_name,
+               a.customer_email,
+               a.appointment_date,
+               a.appointment_time,
+               s.name AS staff_name,
+               sv.name AS service_name,
+               sv.duration_minutes
+        FROM claimed c
+        JOIN appointments a
+          ON a.id = c.appointment_id AND a.appointment_date = %(day)s
+        JOIN staff s ON s.id = a.staff_id
+        JOIN services sv ON sv.id = a.service_id
+        ORDER BY a.appointment_time
+        """,
+        {
+            "day": appointment_date,
+            "transport": transport_name,
+            "token": claim_token,
+            "location_id": location_id,
+            "timeout": REMINDER_CLAIM_TIMEOUT
+        }
+    )
+    return cur.fetchall()
+
+def render_message(appt: dict):
+    time_str = str(appt["appointment_time"])[:5]
+    return {
+        "appointment_id": appt["id"],
+        "to": appt["customer_email"],
+        "subject": f"Reminder: {appt['service_name']} on {appt['appointment_date']}",
+        "body": (
+            f"Hi {appt['customer_name']},\n\n"
+            f"This is a reminder of your {appt['service_name']} "
+            f"({appt['duration_minutes']} min) with {appt['staff_name']} "
+            f"on {appt['appointment_date']} at {time_str}.\n\n"
+            "See you soon!"
+        )
+    }
+
+# ---------------- DELIVERY ----------------
+async def deliver_with_retries(transport, message: dict, semaphore):
+    """Returns (attempts, status) with status SENT, FAILED or REJECTED."""
+    from app.reminders.transports import PermanentDeliveryError
+
+    async with semaphore:
+        for attempt in range(1, REMINDER_MAX_RETRIES + 1):
+            try:
+                await transport.send(message)
+                return attempt, "SENT"
+            except PermanentDeliveryError:
+                logger.warning("Reminder %s rejected", message["appointment_id"])
+                return attempt, "REJECTED"
+            except Exception:
+                if attempt == REMINDER_MAX_RETRIES:
+                    logger.exception(
+                        "Reminder %s failed", message["appointment_id"]
+                    )
+                    return attempt, "FAILED"
+                metrics["retries"] += 1
+                await asyncio.sleep(REMINDER_RETRY_DELAY * 2 ** (attempt - 1))
+
+async def deliver_all(transport, messages: list, settle):
+    """Send in chunks of REMINDER_SETTLE_BATCH, calling the blocking
+    `settle(chunk, results)` after each so progress is recorded as it
+    happens rather than once at the end."""
+    semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
+    results = []
+    for start in range(0, len(messages), REMINDER_SETTLE_BATCH):
+        chunk = messages[start:start + REMINDER_SETTLE_BATCH]
+        chunk_results = await asyncio.gather(*(
+            deliver_with_retries(transport, message, semaphore)
+            for message in chunk
+        ))
+        await asyncio.to_thread(settle, chunk, chunk_results)
+        results.extend(chunk_results)
+    return results
+
+def settle_claims(
+    appointment_date: date,
+    claim_token: str,
+    messages: list,
+    results: list
+):
+    """Record the outcome of `messages` and renew the run's other claims.
+
+    Only rows still holding `claim_token` are touched, so a run whose
+    claims were taken over cannot overwrite the newer run's outcome.
+    """
+    conn, cur = get_cursor()
+    cur.execute(
+        """
+        UPDATE reminder_deliveries d
+        SET status = r.status,
+            attempts = d.attempts + r.attempts,
+            sent_at = CASE WHEN r.status = 'SENT' THEN NOW() END
+        FROM unnest(%s::int[], %s::int[], %s::text[])
+             AS r(appointment_id, attempts, status)
+        WHERE d.appointment_date = %s
+          AND d.appointment_id = r.appointment_id
+          AND d.claim_token = %s::uuid
+        """,
+        (
+            [m["appointment_id"] for m in messages],
+            [attempt for attempt, _ in results],
+            [status for _, status in results],
+            appointment_date,
+            claim_token
+        )
+    )
+    cur.execute(
+        """
+        UPDATE reminder_deliveries
+        SET claimed_at = NOW()
+        WHERE claim_token = %s::uuid AND status = 'SENDING'
+        """,
+        (claim_token,)
+    )
+    conn.commit()
+    conn.close()
+
+def dispatch_reminders(
+    appointment_date: date = None,
+    transport_name: str = None,
+    location_id: int = None
+):
+    """Send reminders for `appointment_date` (tomorrow by default)."""
+    # transports pull in smtplib/email/urllib; keep them out of worker boot
+    from app.reminders.transports import get_transport
+
+    appointment_date = appointment_date or date.today() + timedelta(days=1)
+    transport = get_transport(transport_name)
+    claim_token = str(uuid.uuid4())
+    started = time.perf_counter()
+
+    conn, cur = get_cursor()
+    due = claim_due_reminders(
+        cur, appointment_date, transport.name, claim_token, location_id
+    )
+    conn.commit()
+    # don't hold a connection while the transport works through the batch
+    conn.close()
+
+    messages = [render_message(appt) for appt in due]
+
+    def settle(chunk, chunk_results):
+        settle_claims(appointment_date, claim_token, chunk, chunk_results)
+
+    results = (
+        asyncio.run(deliver_all(transport, messages, settle)) if messages else []
+    )
+
+    outcomes = {"SENT": [], "FAILED": [], "REJECTED": []}
+    for message, (_, status) in zip(messages, results):
+        outcomes[status].append(message["appointment_id"])
+    attempts = sum(attempt for attempt, _ in results)
+
+    elapsed = time.perf_counter() - started
+    metrics["runs"] += 1
+    metrics["sent"] += len(outcomes["SENT"])
+    metrics["failed"] += len(outcomes["FAILED"])
+    metrics["rejected"] += len(outcomes["REJECTED"])
+    metrics["last_run_due"] = len(messages)
+    metrics["last_run_seconds"] = round(elapsed, 3)
+    metrics["last_run_per_second"] = (
+        round(len(outcomes["SENT"]) / elapsed, 2) if elapsed else 0.0
+    )
+
+    return {
+        "appointment_date": appointment_date,
+        "transport": transport.name,
+        "due": len(messages),
+        "sent": len(outcomes["SENT"]),
+        "failed": outcomes["FAILED"],
+        "rejected": outcomes["REJECTED"],
+        "attempts": attempts,
+        "seconds": metrics["last_run_seconds"]
+    }
+
+# ---------------- BACKGROUND RUNS ----------------
+def start_run(appointment_date: date, transport_name: str, location_id: int):
+    """Record a run and dispatch it on a background thread; returns its id."""
+    conn, cur = get_cursor()
+    cur.execute(
+        """
+        INSERT INTO reminder_runs (location_id, appointment_date, transport)
+        VALUES (%s, %s, %s)
+        RETURNING id
+        """,
+        (location_id, appointment_date, transport_name)
+    )
+    run_id = cur.fetchone()["id"]
+    conn.commit()
+    conn.close()
+
+    threading.Thread(
+        target=run_in_background,
+        args=(run_id, appointment_date, transport_name, location_id),
+        name=f"reminder-run-{run_id}",
+        daemon=True
+    ).start()
+    return run_id
+
+def run_in_background(
+    run_id: int,
+    appointment_date: date,
+    transport_name: str,
+    location_id: int
+):
+    result, error = None, None
+    try:
+        result = dispatch_reminders(appointment_date, transport_name, location_id)
+    except Exception as e:
+        logger.exception("Reminder run %s failed", run_id)
+        error = str(e)
+
+    conn, cur = get_cursor()
+    cur.execute(
+        """
+        UPDATE reminder_runs
+        SET status = %s, result = %s, error = %s, finished_at = NOW()
+        WHERE id = %s
+        """,
+        (
+            "FAILED" if error else "DONE",
+            json.dumps(result, default=str) if result is not None else None,
+            error,
+            run_id
+        )
+    )
+    conn.commit()
+    conn.close()
+
+# ---------------- ENDPOINTS ----------------
+@router.post("/dispatch", status_code=202)
+def dispatch(
+    appointment_date: str = None,
+    transport: str = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Start a reminder run in the background; poll /reminders/runs/{id}."""
+    from app.reminders.transports import get_transport
+
+    # 🔐 admin only
+    check_admin_permission(current_user)
+
+    try:
+        day = (
+            date.fromisoformat(appointment_date) if appointment_date
+            else date.today() + timedelta(days=1)
+        )
+        transport_name = get_transport(transport).name
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    run_id = start_run(day, transport_name, current_user["location_id"])
+
+    audit(
+        current_user, "DISPATCH", "reminder_run", run_id,
+        {"appointment_date": day, "transport": transport_name}
+    )
+    return {"run_id": run_id, "status": "RUNNING"}
+
+@router.get("/runs/{run_id}")
+def get_run(
+    run_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 admin only
+    check_admin_permission(current_user)
+
+    conn, cur = get_cursor()
+    cur.execute(
+        """
+        SELECT id, appointment_date, transport, status, result, error,
+               started_at, finished_at
+        FROM reminder_runs
+        WHERE id = %s AND location_id = %s
+        """,
+        (run_id, current_user["location_id"])
+    )
+    run = cur.fetchone()
+    conn.close()
+
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    return run
+
+@router.get("/metrics")
+def reminder_metrics(
+    current_user: dict = Depends(get_current_user)
+):
+    # 🔐 main branch admin only
+    check_global_admin_permission(current_user)
+
+    return metrics
+
+# ---------------- CRON ENTRY POINT ----------------
+if __name__ == "__main__":
+    print(dispatch_reminders())
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import asyncio
+import smtplib
+import urllib.error
+import urllib.request
+from email.message import EmailMessage
+
+REMINDER_FROM = os.getenv("REMINDER_FROM", "no-reply@salon.local")
+
+class PermanentDeliveryError(Exception):
+    """Raised when retrying a message cannot succeed."""
+
+# ---------------- BASE TRANSPORT ----------------
+class Transport:
+    """Delivers rendered reminders, spaced to at most `rate_limit` per second.
+
+    Subclasses implement the blocking `deliver`; it runs in a worker thread
+    so many messages can be in flight at once.
+    """
+
+    name = "base"
+
+    def __init__(self, rate_limit: float = 10.0):
+        self.rate_limit = rate_limit
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def _wait_for_slot(self):
+        if self.rate_limit <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1 / self.rate_limit
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def send(self, message: dict):
+        await self._wait_for_slot()
+        await asyncio.to_thread(self.deliver, message)
+
+    def deliver(self, message: dict):
+        raise NotImplementedError
+
+# ---------------- SMTP ----------------
+class SmtpTransport(Transport):
+    name = "smtp"
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        username: str = None,
+        password: str = None,
+        use_tls: bool = False,
+        rate_limit: float = 10.0
+    ):
+        super().__init__(rate_limit)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+
+    def deliver(self, message: dict):
+        if not message["to"]:
+            raise PermanentDeliveryError("No recipient address")
+
+        email = EmailMessage()
+        email["From"] = REMINDER_FROM
+        email["To"] = message["to"]
+        email["Subject"] = message["subject"]
+        email.set_content(message["body"])
+
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            try:
+                smtp.send_message(email)
+            except smtplib.SMTPRecipientsRefused as e:
+                raise PermanentDeliveryError(str(e))
+
+# ---------------- WEBHOOK ----------------
+class WebhookTransport(Transport):
+    name = "webhook"
+
+    def __init__(self, url: str, rate_limit: float = 10.0):
+        super().__init__(rate_limit)
+        self.url = url
+
+    def deliver(self, message: dict):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(message, default=str).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            urllib.request.urlopen(request, timeout=30).close()
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500:
+                raise PermanentDeliveryError(f"Webhook returned {e.code}")
+            raise
+
+# ---------------- FILE ----------------
+class FileTransport(Transport):
+    """Appends one JSON line per reminder; handy for local runs."""
+
+    name = "file"
+
+    def __init__(self, path: str = "reminders.jsonl", rate_limit: float = 0):
+        super().__init__(rate_limit)
+        self.path = path
+
+    def deliver(self, message: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(message, default=str) + "\n")
+
+# ---------------- FACTORY ----------------
+def get_transport(name: str = None):
+    name = name or os.getenv("REMINDER_TRANSPORT", "file")
+    rate_limit = float(os.getenv("REMINDER_RATE_LIMIT", "10"))
+
+    if name == "smtp":
+        return SmtpTransport(
+            host=os.getenv("SMTP_HOST", "localhost"),
+            port=int(os.getenv("SMTP_PORT", "25")),
+            username=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASSWORD"),
+            use_tls=os.getenv("SMTP_TLS", "false").lower() == "true",
+            rate_limit=rate_limit
+        )
+    if name == "webhook":
+        url = os.getenv("REMINDER_WEBHOOK_URL")
+        if not url:
+            raise ValueError("REMINDER_WEBHOOK_URL is not set")
+        return WebhookTransport(url, rate_limit)
+    if name == "file":
+        return FileTransport(
+            os.getenv("REMINDER_FILE", "reminders.jsonl"), rate_limit
+        )
+    raise ValueError(f"Unknown reminder transport: {name}")
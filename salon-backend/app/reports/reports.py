@@ -1,19 +1,28 @@
-from fastapi import APIRouter
+import os
+from fastapi import APIRouter, HTTPException
 from app.database import get_cursor
+from app.auth.auth import DEFAULT_LOCATION_ID
 
 router = APIRouter()
 
+VALID_GRANULARITIES = ["day", "week", "month"]
+
+# minutes a staff member is available per day, used as utilization capacity
+SALON_OPEN_HOUR = int(os.getenv("SALON_OPEN_HOUR", "9"))
+SALON_CLOSE_HOUR = int(os.getenv("SALON_CLOSE_HOUR", "18"))
+AVAILABLE_MINUTES_PER_DAY = (SALON_CLOSE_HOUR - SALON_OPEN_HOUR) * 60
+
 # ---------------- DAILY APPOINTMENTS ----------------
 @router.get("/daily-appointments")
-def daily_appointments(date: str):
+def daily_appointments(date: str, location_id: int = DEFAULT_LOCATION_ID):
     conn, cur = get_cursor()
     cur.execute(
         """
-        SELECT COUNT(*) AS total_appointments
-        FROM appointments
-        WHERE appointment_date = %s
+        SELECT COALESCE(SUM(total_appointments), 0) AS total_appointments
+        FROM appointment_counts
+        WHERE location_id = %s AND appointment_date = %s
         """,
-        (date,)
+        (location_id, date)
     )
     result = cur.fetchone()
     conn.close()
@@ -24,15 +33,17 @@ def daily_appointments(date: str):
 
 # ---------------- APPOINTMENTS BY STATUS ----------------
 @router.get("/appointments-by-status")
-def appointments_by_status():
+def appointments_by_status(location_id: int = DEFAULT_LOCATION_ID):
     conn, cur = get_cursor()
     cur.execute(
         """
-        SELECT status, COUNT(*) AS count
-        FROM appointments
+        SELECT status, SUM(total_appointments) AS count
+        FROM appointment_counts
+        WHERE location_id = %s
         GROUP BY status
         ORDER BY count DESC
-        """
+        """,
+        (location_id,)
     )
     data = cur.fetchall()
     conn.close()
@@ -40,18 +51,21 @@ def appointments_by_status():
 
 # ---------------- STAFF PERFORMANCE ----------------
 @router.get("/staff-performance")
-def staff_performance():
+def staff_performance(location_id: int = DEFAULT_LOCATION_ID):
     conn, cur = get_cursor()
     cur.execute(
         """
         SELECT s.id,
                s.name,
-               COUNT(a.id) AS total_appointments
+               COALESCE(SUM(a.total_appointments), 0) AS total_appointments
         FROM staff s
-        LEFT JOIN appointments a ON s.id = a.staff_id
+        LEFT JOIN appointment_counts a
+          ON a.location_id = s.location_id AND a.staff_id = s.id
+        WHERE s.location_id = %s
         GROUP BY s.id, s.name
         ORDER BY total_appointments DESC
-        """
+        """,
+        (location_id,)
     )
     data = cur.fetchall()
     conn.close()
@@ -59,19 +73,202 @@ def staff_performance():
 
 # ---------------- SERVICE POPULARITY ----------------
 @router.get("/service-popularity")
-def service_popularity():
+def service_popularity(location_id: int = DEFAULT_LOCATION_ID):
     conn, cur = get_cursor()
     cur.execute(
         """
         SELECT sv.id,
                sv.name,
-               COUNT(a.id) AS total_bookings
+               COALESCE(SUM(a.total_appointments), 0) AS total_bookings
         FROM services sv
-        LEFT JOIN appointments a ON sv.id = a.service_id
+        LEFT JOIN appointment_counts a
+          ON a.location_id = sv.location_id AND a.service_id = sv.id
+        WHERE sv.location_id = %s
         GROUP BY sv.id, sv.name
         ORDER BY total_bookings DESC
-        """
+        """,
+        (location_id,)
     )
     data = cur.fetchall()
     conn.close()
     return data
+
+# ---------------- STAFF UTILIZATION ----------------
+@router.get("/utilization")
+def utilization(
+    date_from: str,
+    date_to: str,
+    granularity: str = "week",
+    staff_id: int = None,
+    location_id: int = DEFAULT_LOCATION_ID
+):
+    if granularity not in VALID_GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid granularity. Use {VALID_GRANULARITIES}"
+        )
+
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=400,
+            detail="date_from must not be after date_to"
+        )
+
+    params = {
+        "granularity": granularity,
+        "date_from": date_from,
+        "date_to": date_to,
+        "staff_id": staff_id,
+        "location_id": location_id,
+        "daily_minutes": AVAILABLE_MINUTES_PER_DAY,
+        "open_hour": SALON_OPEN_HOUR,
+        "close_hour": SALON_CLOSE_HOUR
+    }
+
+    conn, cur = get_cursor()
+
+    # booked vs available minutes per staff and bucket; reads the
+    # appointment_counts view so archived months are still covered
+    cur.execute(
+        """
+        WITH buckets AS (
+            SELECT date_trunc(%(granularity)s, d)::date AS bucket,
+                   COUNT(*) * %(daily_minutes)s AS available_minutes
+            FROM generate_series(
+                %(date_from)s::date, %(date_to)s::date, INTERVAL '1 day'
+            ) AS d
+            GROUP BY 1
+        ),
+        booked AS (
+            SELECT a.staff_id,
+                   date_trunc(%(granularity)s, a.appointment_date)::date AS bucket,
+                   SUM(a.total_appointments * sv.duration_minutes)
+                       FILTER (WHERE a.status <> 'CANCELLED') AS booked_minutes,
+                   SUM(a.total_appointments)
+                       FILTER (WHERE a.status <> 'CANCELLED') AS appointments,
+                   SUM(a.total_appointments)
+                       FILTER (WHERE a.status = 'NO_SHOW') AS no_shows
+            FROM appointment_counts a
+            JOIN services sv ON sv.id = a.service_id
+            WHERE a.location_id = %(location_id)s
+              AND a.appointment_date BETWEEN %(date_from)s AND %(date_to)s
+              AND (%(staff_id)s::int IS NULL OR a.staff_id = %(staff_id)s)
+            GROUP BY 1, 2
+        )
+        SELECT s.id AS staff_id,
+               s.name AS staff_name,
+               b.bucket,
+               COALESCE(bk.booked_minutes, 0) AS booked_minutes,
+               b.available_minutes,
+               ROUND(COALESCE(bk.booked_minutes, 0)::numeric
+                     / NULLIF(b.available_minutes, 0), 4) AS utilization,
+               COALESCE(bk.appointments, 0) AS appointments,
+               COALESCE(bk.no_shows, 0) AS no_shows,
+               ROUND(COALESCE(bk.no_shows, 0)::numeric
+                     / NULLIF(bk.appointments, 0), 4) AS no_show_rate
+        FROM staff s
+        CROSS JOIN buckets b
+        LEFT JOIN booked bk ON bk.staff_id = s.id AND bk.bucket = b.bucket
+        WHERE s.location_id = %(location_id)s
+          AND (s.is_active OR bk.staff_id IS NOT NULL)
+          AND (%(staff_id)s::int IS NULL OR s.id = %(staff_id)s)
+        ORDER BY s.id, b.bucket
+        """,
+        params
+    )
+    rows = cur.fetchall()
+
+    # the heatmap needs appointment times, which archived months only keep
+    # as daily rollups; it starts at the first month still in appointments
+    cur.execute(
+        """
+        SELECT (date_trunc('month', MAX(appointment_date))
+                + INTERVAL '1 month')::date AS live_from
+        FROM appointment_rollups
+        WHERE location_id = %(location_id)s
+          AND appointment_date <= %(date_to)s
+        """,
+        params
+    )
+    live_from = cur.fetchone()["live_from"]
+    heatmap_from = max(date_from, str(live_from)) if live_from else date_from
+    params["heatmap_from"] = heatmap_from
+
+    # hourly occupancy by weekday: each appointment is split across the
+    # clock hours it overlaps, then divided by the staff-hours on offer
+    cur.execute(
+        """
+        WITH slots AS (
+            SELECT a.appointment_date + a.appointment_time AS starts_at,
+                   a.appointment_date + a.appointment_time
+                       + make_interval(mins => sv.duration_minutes) AS ends_at
+            FROM appointments a
+            JOIN services sv ON sv.id = a.service_id
+            WHERE a.location_id = %(location_id)s
+              AND a.appointment_date BETWEEN %(heatmap_from)s AND %(date_to)s
+              AND a.status <> 'CANCELLED'
+              AND (%(staff_id)s::int IS NULL OR a.staff_id = %(staff_id)s)
+        ),
+        hourly AS (
+            SELECT EXTRACT(ISODOW FROM h)::int AS weekday,
+                   EXTRACT(HOUR FROM h)::int AS hour,
+                   SUM(EXTRACT(EPOCH FROM
+                       LEAST(sl.ends_at, h + INTERVAL '1 hour')
+                       - GREATEST(sl.starts_at, h)
+                   ) / 60) AS booked_minutes
+            FROM slots sl
+            CROSS JOIN LATERAL generate_series(
+                date_trunc('hour', sl.starts_at),
+                sl.ends_at - INTERVAL '1 second',
+                INTERVAL '1 hour'
+            ) AS h
+            GROUP BY 1, 2
+        ),
+        weekdays AS (
+            SELECT EXTRACT(ISODOW FROM d)::int AS weekday, COUNT(*) AS days
+            FROM generate_series(
+                %(heatmap_from)s::date, %(date_to)s::date, INTERVAL '1 day'
+            ) AS d
+            GROUP BY 1
+        ),
+        headcount AS (
+            -- the same staff the utilization rows are computed for
+            SELECT COUNT(*) AS staff
+            FROM staff s
+            WHERE s.location_id = %(location_id)s
+              AND (%(staff_id)s::int IS NULL OR s.id = %(staff_id)s)
+              AND (s.is_active OR EXISTS (
+                  SELECT 1 FROM appointment_counts a
+                  WHERE a.location_id = %(location_id)s
+                    AND a.staff_id = s.id
+                    AND a.appointment_date BETWEEN %(date_from)s AND %(date_to)s
+              ))
+        )
+        SELECT w.weekday,
+               hr.hour,
+               ROUND(COALESCE(ho.booked_minutes, 0)::numeric, 1) AS booked_minutes,
+               ROUND(COALESCE(ho.booked_minutes, 0)::numeric
+                     / NULLIF(w.days * hc.staff * 60, 0), 4) AS occupancy
+        FROM weekdays w
+        CROSS JOIN generate_series(
+            %(open_hour)s::int, %(close_hour)s::int - 1
+        ) AS hr(hour)
+        CROSS JOIN headcount hc
+        LEFT JOIN hourly ho ON ho.weekday = w.weekday AND ho.hour = hr.hour
+        ORDER BY w.weekday, hr.hour
+        """,
+        params
+    )
+    heatmap = cur.fetchall()
+    conn.close()
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "granularity": granularity,
+        "utilization": rows,
+        # archived months are left out of the heatmap, not counted as idle
+        "heatmap_from": heatmap_from,
+        "heatmap_complete": heatmap_from == date_from,
+        "heatmap": heatmap
+    }
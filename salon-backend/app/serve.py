@@ -0,0 +1,47 @@
+"""Production entry point.
+
+    python -m app.serve --workers 4 --port 8000
+
+Starts N uvicorn workers. Each worker opens its own connection pool, sized
+so that all workers together stay within DB_MAX_CONNECTIONS, and warms its
+caches in the app lifespan before accepting traffic. On SIGTERM in-flight
+requests get --graceful-timeout seconds to finish before pools are closed.
+"""
+import os
+import argparse
+
+import uvicorn
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the salon API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--db-max-connections", type=int,
+                        default=int(os.getenv("DB_MAX_CONNECTIONS", "100")),
+                        help="connection budget shared by all workers")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args()
+
+    # one connection per worker is left for the audit writer
+    pool_max = max(2, args.db_max_connections // args.workers - 1)
+    os.environ["DB_POOL_MAX"] = str(pool_max)
+    # keep every connection open once made; a smaller minimum makes the
+    # pool close and reopen connections on each burst
+    os.environ["DB_POOL_MIN"] = str(pool_max)
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        proxy_headers=True,
+        access_log=not args.no_access_log,
+        timeout_graceful_shutdown=args.graceful_timeout
+    )
+
+if __name__ == "__main__":
+    main()
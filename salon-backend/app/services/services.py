@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.database import get_cursor
+from app.cache import catalog_cache
 from app.auth.utils import get_current_user
+from app.auth.auth import DEFAULT_LOCATION_ID
+from app.audit.audit import audit
 
 router = APIRouter()
 
@@ -26,33 +29,53 @@ def create_service(
     conn, cur = get_cursor()
     cur.execute(
         """
-        INSERT INTO services (name, duration_minutes, category)
-        VALUES (%s, %s, %s)
+        INSERT INTO services (name, duration_minutes, category, location_id)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
         """,
-        (name, duration_minutes, category)
+        (name, duration_minutes, category, current_user["location_id"])
     )
+    service_id = cur.fetchone()["id"]
     conn.commit()
     conn.close()
+    catalog_cache.delete(("services", current_user["location_id"]))
+
+    audit(current_user, "CREATE", "service", service_id, {
+        "name": name,
+        "duration_minutes": duration_minutes,
+        "category": category
+    })
 
     return {"message": "Service created successfully"}
 
 # ---------------- READ ----------------
-@router.get("/")
-def get_all_services():
-    conn, cur = get_cursor()
-    cur.execute(
-        "SELECT * FROM services WHERE is_active = TRUE"
-    )
-    data = cur.fetchall()
-    conn.close()
+def list_active_services(location_id: int):
+    key = ("services", location_id)
+    data = catalog_cache.get(key)
+    if data is None:
+        conn, cur = get_cursor()
+        cur.execute(
+            "SELECT * FROM services WHERE location_id = %s AND is_active = TRUE",
+            (location_id,)
+        )
+        data = cur.fetchall()
+        conn.close()
+        catalog_cache.set(key, data)
     return data
 
+@router.get("/")
+def get_all_services(location_id: int = DEFAULT_LOCATION_ID):
+    return list_active_services(location_id)
+
 @router.get("/{service_id}")
-def get_service_by_id(service_id: int):
+def get_service_by_id(
+    service_id: int,
+    location_id: int = DEFAULT_LOCATION_ID
+):
     conn, cur = get_cursor()
     cur.execute(
-        "SELECT * FROM services WHERE id = %s",
-        (service_id,)
+        "SELECT * FROM services WHERE location_id = %s AND id = %s",
+        (location_id, service_id)
     )
     service = cur.fetchone()
     conn.close()
@@ -81,9 +104,10 @@ def update_service(
         SET name = %s,
             duration_minutes = %s,
             category = %s
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
         """,
-        (name, duration_minutes, category, service_id)
+        (name, duration_minutes, category, current_user["location_id"],
+         service_id)
     )
 
     if cur.rowcount == 0:
@@ -92,6 +116,13 @@ def update_service(
 
     conn.commit()
     conn.close()
+    catalog_cache.delete(("services", current_user["location_id"]))
+
+    audit(current_user, "UPDATE", "service", service_id, {
+        "name": name,
+        "duration_minutes": duration_minutes,
+        "category": category
+    })
     return {"message": "Service updated successfully"}
 
 # ---------------- PARTIAL UPDATE (PATCH) ----------------
@@ -127,12 +158,13 @@ def patch_service(
         fields.append("category = %s")
         values.append(category)
 
+    values.append(current_user["location_id"])
     values.append(service_id)
 
     query = f"""
         UPDATE services
         SET {', '.join(fields)}
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
     """
 
     conn, cur = get_cursor()
@@ -144,6 +176,13 @@ def patch_service(
 
     conn.commit()
     conn.close()
+    catalog_cache.delete(("services", current_user["location_id"]))
+
+    audit(current_user, "PATCH", "service", service_id, {
+        "name": name,
+        "duration_minutes": duration_minutes,
+        "category": category
+    })
     return {"message": "Service updated successfully"}
 
 # ---------------- DELETE (SOFT DELETE) ----------------
@@ -160,9 +199,9 @@ def delete_service(
         """
         UPDATE services
         SET is_active = FALSE
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
         """,
-        (service_id,)
+        (current_user["location_id"], service_id)
     )
 
     if cur.rowcount == 0:
@@ -171,4 +210,7 @@ def delete_service(
 
     conn.commit()
     conn.close()
+    catalog_cache.delete(("services", current_user["location_id"]))
+
+    audit(current_user, "DELETE", "service", service_id)
     return {"message": "Service deleted successfully"}
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.database import get_cursor
+from app.cache import catalog_cache
 from app.auth.utils import get_current_user
+from app.auth.auth import DEFAULT_LOCATION_ID
+from app.audit.audit import audit
 
 router = APIRouter()
 
@@ -24,31 +27,47 @@ def create_staff(
 
     conn, cur = get_cursor()
     cur.execute(
-        "INSERT INTO staff (name, role) VALUES (%s, %s)",
-        (name, role)
+        """
+        INSERT INTO staff (name, role, location_id)
+        VALUES (%s, %s, %s)
+        RETURNING id
+        """,
+        (name, role, current_user["location_id"])
     )
+    staff_id = cur.fetchone()["id"]
     conn.commit()
     conn.close()
+    catalog_cache.delete(("staff", current_user["location_id"]))
+
+    audit(current_user, "CREATE", "staff", staff_id, {"name": name, "role": role})
 
     return {"message": "Staff created successfully"}
 
 # ---------------- READ ----------------
-@router.get("/")
-def get_all_staff():
-    conn, cur = get_cursor()
-    cur.execute(
-        "SELECT * FROM staff WHERE is_active = TRUE"
-    )
-    data = cur.fetchall()
-    conn.close()
+def list_active_staff(location_id: int):
+    key = ("staff", location_id)
+    data = catalog_cache.get(key)
+    if data is None:
+        conn, cur = get_cursor()
+        cur.execute(
+            "SELECT * FROM staff WHERE location_id = %s AND is_active = TRUE",
+            (location_id,)
+        )
+        data = cur.fetchall()
+        conn.close()
+        catalog_cache.set(key, data)
     return data
 
+@router.get("/")
+def get_all_staff(location_id: int = DEFAULT_LOCATION_ID):
+    return list_active_staff(location_id)
+
 @router.get("/{staff_id}")
-def get_staff_by_id(staff_id: int):
+def get_staff_by_id(staff_id: int, location_id: int = DEFAULT_LOCATION_ID):
     conn, cur = get_cursor()
     cur.execute(
-        "SELECT * FROM staff WHERE id = %s",
-        (staff_id,)
+        "SELECT * FROM staff WHERE location_id = %s AND id = %s",
+        (location_id, staff_id)
     )
     staff = cur.fetchone()
     conn.close()
@@ -74,9 +93,9 @@ def update_staff(
         """
         UPDATE staff
         SET name = %s, role = %s
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
         """,
-        (name, role, staff_id)
+        (name, role, current_user["location_id"], staff_id)
     )
 
     if cur.rowcount == 0:
@@ -85,6 +104,9 @@ def update_staff(
 
     conn.commit()
     conn.close()
+    catalog_cache.delete(("staff", current_user["location_id"]))
+
+    audit(current_user, "UPDATE", "staff", staff_id, {"name": name, "role": role})
     return {"message": "Staff updated successfully"}
 
 # ---------------- PARTIAL UPDATE (PATCH) ----------------
@@ -115,12 +137,13 @@ def patch_staff(
         fields.append("role = %s")
         values.append(role)
 
+    values.append(current_user["location_id"])
     values.append(staff_id)
 
     query = f"""
         UPDATE staff
         SET {', '.join(fields)}
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
     """
 
     conn, cur = get_cursor()
@@ -132,6 +155,9 @@ def patch_staff(
 
     conn.commit()
     conn.close()
+    catalog_cache.delete(("staff", current_user["location_id"]))
+
+    audit(current_user, "PATCH", "staff", staff_id, {"name": name, "role": role})
     return {"message": "Staff updated successfully"}
 
 # ---------------- DELETE (SOFT DELETE) ----------------
@@ -148,9 +174,9 @@ def delete_staff(
         """
         UPDATE staff
         SET is_active = FALSE
-        WHERE id = %s
+        WHERE location_id = %s AND id = %s
         """,
-        (staff_id,)
+        (current_user["location_id"], staff_id)
     )
 
     if cur.rowcount == 0:
@@ -159,4 +185,7 @@ def delete_staff(
 
     conn.commit()
     conn.close()
+    catalog_cache.delete(("staff", current_user["location_id"]))
+
+    audit(current_user, "DELETE", "staff", staff_id)
     return {"message": "Staff deleted successfully"}
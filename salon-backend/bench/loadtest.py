@@ -0,0 +1,372 @@
+"""Drive the API with scenario mixes and record latency baselines.
+
+    python -m bench.loadtest --serve --scenario dashboard_polling \\
+        --duration 30 --concurrency 20 --out bench/baselines/dashboard.json
+
+Run bench.seed first. With --serve the app is started under uvicorn with
+DB_QUERY_STATS=true so per-endpoint query counts are reported; otherwise
+point --url at a server started the same way. Set BENCH_USERS to the
+seeded user count so login_storm spreads over all users, and
+--anchor-date to the seed's anchor so reports and exports read the same
+date ranges; it is recorded in the results. --compare exits non-zero
+when p95 latency or throughput regresses past --threshold.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import math
+import random
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timedelta
+
+from bench.seed import SEED_PASSWORD, FIRST_NAMES, LAST_NAMES
+
+# ---------------- HTTP CLIENT ----------------
+class Client:
+    def __init__(self, base_url: str, token: str = None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+
+    def request(self, method: str, path: str, params: dict = None):
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        request = urllib.request.Request(url, method=method)
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read() or "null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def login(self, email: str):
+        status, body = self.request(
+            "POST", "/auth/login", {"email": email, "password": SEED_PASSWORD}
+        )
+        if status != 200:
+            raise RuntimeError(f"Login failed for {email}: {status}")
+        self.token = body["access_token"]
+
+    @property
+    def location_id(self):
+        payload = self.token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["location_id"]
+
+# ---------------- SCENARIOS ----------------
+# each step: (weight, label, route key as reported by /debug/query-stats,
+#             builder(rng, ctx) -> (method, path, params))
+def book(rng, ctx):
+    # bookings must be in the real future, whatever the seed's anchor
+    day = date.today() + timedelta(days=rng.randint(1, 60))
+    return "POST", "/appointments/", {
+        "customer_name": f"Bench Customer {rng.randint(1, 100_000)}",
+        "staff_id": rng.choice(ctx["staff"][ctx["location_id"]]),
+        "service_id": rng.choice(ctx["services"][ctx["location_id"]]),
+        "appointment_date": day.isoformat(),
+        "appointment_time": f"{rng.randint(9, 17):02d}:{rng.choice([0, 30]):02d}"
+    }
+
+def login(rng, ctx):
+    # every tenth seeded user is staff{i}, the rest are user{i}
+    i = rng.randrange(ctx["users"])
+    if i % 10 == 0:
+        i += 1
+    return "POST", "/auth/login", {
+        "email": f"user{i}@seed.local",
+        "password": SEED_PASSWORD
+    }
+
+def typeahead(rng, ctx):
+    # front desk typing a name: a 2-6 character prefix, sometimes a surname
+    name = rng.choice(LAST_NAMES if rng.random() < 0.3 else FIRST_NAMES)
+    return "GET", "/appointments/search", {"q": name[:rng.randint(2, 6)]}
+
+def date_window(rng, ctx, days: int):
+    start = ctx["anchor"] - timedelta(days=rng.randint(0, 365))
+    return start.isoformat(), (start + timedelta(days=days)).isoformat()
+
+def export_month(rng, ctx):
+    date_from, date_to = date_window(rng, ctx, 30)
+    return "GET", "/appointments/filter", {
+        "date_from": date_from, "date_to": date_to
+    }
+
+def utilization(rng, ctx):
+    date_from, date_to = date_window(rng, ctx, 30)
+    return "GET", "/reports/utilization", {
+        "date_from": date_from, "date_to": date_to, "granularity": "day"
+    }
+
+SCENARIOS = {
+    "booking_rush": {
+        "role": "customer",
+        "steps": [
+            (6, "book", "POST /appointments/", book),
+            (2, "list_staff", "GET /staff/",
+             lambda rng, ctx: ("GET", "/staff/", None)),
+            (2, "list_services", "GET /services/",
+             lambda rng, ctx: ("GET", "/services/", None))
+        ]
+    },
+    "dashboard_polling": {
+        "role": "admin",
+        "steps": [
+            (3, "daily_appointments", "GET /reports/daily-appointments",
+             lambda rng, ctx: ("GET", "/reports/daily-appointments",
+                               {"date": ctx["anchor"].isoformat()})),
+            (2, "by_status", "GET /reports/appointments-by-status",
+             lambda rng, ctx: ("GET", "/reports/appointments-by-status", None)),
+            (2, "staff_performance", "GET /reports/staff-performance",
+             lambda rng, ctx: ("GET", "/reports/staff-performance", None)),
+            (1, "utilization", "GET /reports/utilization", utilization),
+            (3, "today", "GET /appointments/filter",
+             lambda rng, ctx: ("GET", "/appointments/filter",
+                               {"appointment_date": ctx["anchor"].isoformat()}))
+        ]
+    },
+    "typeahead": {
+        "role": "admin",
+        "steps": [
+            (1, "search", "GET /appointments/search", typeahead)
+        ]
+    },
+    "login_storm": {
+        "role": None,
+        "steps": [
+            (1, "login", "POST /auth/login", login)
+        ]
+    },
+    "export": {
+        "role": "admin",
+        "steps": [
+            (1, "export_month", "GET /appointments/filter", export_month)
+        ]
+    }
+}
+
+# ---------------- RUNNER ----------------
+def percentile(sorted_values: list, pct: float):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[index] * 1000, 2)
+
+def worker(base_url, scenario, ctx, seed, deadline, results, lock):
+    rng = random.Random(seed)
+    client = Client(base_url)
+    if scenario["role"] == "admin":
+        client.login("admin1@seed.local")
+    elif scenario["role"] == "customer":
+        client.login(f"user{seed % 9 + 1}@seed.local")
+    if scenario["role"]:
+        ctx = dict(ctx, location_id=client.location_id)
+
+    weights = [step[0] for step in scenario["steps"]]
+    local = {}
+    while time.perf_counter() < deadline:
+        _, label, _, builder = rng.choices(scenario["steps"], weights)[0]
+        method, path, params = builder(rng, ctx)
+        started = time.perf_counter()
+        status, _ = client.request(method, path, params)
+        elapsed = time.perf_counter() - started
+        entry = local.setdefault(label, {"latencies": [], "errors": 0})
+        entry["latencies"].append(elapsed)
+        if status >= 400:
+            entry["errors"] += 1
+
+    with lock:
+        for label, entry in local.items():
+            merged = results.setdefault(label, {"latencies": [], "errors": 0})
+            merged["latencies"].extend(entry["latencies"])
+            merged["errors"] += entry["errors"]
+
+def run_scenario(base_url, name, duration, concurrency, seed, anchor):
+    scenario = SCENARIOS[name]
+    admin = Client(base_url)
+    admin.login("admin1@seed.local")
+    _, locations = admin.request("GET", "/locations/")
+    ctx = {
+        "staff": {},
+        "services": {},
+        "users": int(os.getenv("BENCH_USERS", "200")),
+        "anchor": anchor
+    }
+    for location in locations:
+        params = {"location_id": location["id"]}
+        _, staff = admin.request("GET", "/staff/", params)
+        _, services = admin.request("GET", "/services/", params)
+        ctx["staff"][location["id"]] = [row["id"] for row in staff]
+        ctx["services"][location["id"]] = [row["id"] for row in services]
+
+    admin.request("DELETE", "/debug/query-stats")
+    results = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(base_url, scenario, ctx, seed + i, deadline, results, lock)
+        )
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    _, query_stats = admin.request("GET", "/debug/query-stats")
+    query_stats = query_stats or {}
+
+    endpoints = {}
+    for _, label, route, _ in scenario["steps"]:
+        entry = results.get(label)
+        if not entry:
+            continue
+        latencies = sorted(entry["latencies"])
+        stats = query_stats.get(route)
+        endpoints[label] = {
+            "route": route,
+            "requests": len(latencies),
+            "errors": entry["errors"],
+            "throughput": round(len(latencies) / elapsed, 2),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            # routes shared by several labels report the route average
+            "db_queries_per_request": (
+                round(stats["queries"] / stats["requests"], 2)
+                if stats and stats["requests"] else None
+            )
+        }
+
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "scenario": name,
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "duration_s": round(elapsed, 2),
+        "concurrency": concurrency,
+        "seed": seed,
+        "anchor_date": anchor.isoformat(),
+        "total_requests": total,
+        "throughput": round(total / elapsed, 2),
+        "endpoints": endpoints
+    }
+
+def compare(result: dict, baseline: dict, threshold: float):
+    """Return a list of regressions against a saved baseline."""
+    regressions = []
+    for label, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{label}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if current["throughput"] < previous["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{label}: throughput {previous['throughput']} -> {current['throughput']} req/s"
+            )
+    return regressions
+
+# ---------------- SERVER ----------------
+def start_server(port: int):
+    env = dict(os.environ, DB_QUERY_STATS="true")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + "/", timeout=1).close()
+            return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--serve", action="store_true",
+                        help="start uvicorn with query stats enabled")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", choices=list(SCENARIOS) + ["all"],
+                        default="all")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor-date", type=date.fromisoformat,
+                        default=date.today(),
+                        help="the --anchor-date bench.seed was run with")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url
+    if args.serve:
+        process, base_url = start_server(args.port)
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    try:
+        results = {
+            name: run_scenario(
+                base_url, name, args.duration, args.concurrency, args.seed,
+                args.anchor_date
+            )
+            for name in names
+        }
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    for result in results.values():
+        print(f"\n{result['scenario']}: {result['throughput']} req/s")
+        for label, e in result["endpoints"].items():
+            print(f"  {label:<20} {e['throughput']:>8} req/s  "
+                  f"p50 {e['p50_ms']}ms  p95 {e['p95_ms']}ms  "
+                  f"p99 {e['p99_ms']}ms  queries {e['db_queries_per_request']}  "
+                  f"errors {e['errors']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        anchors = {r.get("anchor_date") for r in baseline.values()}
+        if anchors != {args.anchor_date.isoformat()}:
+            print(f"\nWarning: baseline anchor {', '.join(map(str, anchors))} "
+                  f"differs from {args.anchor_date}; the data may not match")
+        regressions = [
+            f"{name}/{line}"
+            for name, result in results.items()
+            if name in baseline
+            for line in compare(result, baseline[name], args.threshold)
+        ]
+        if regressions:
+            print("\nRegressions:")
+            print("\n".join(f"  {line}" for line in regressions))
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Fill the database with deterministic synthetic data for benchmarking.
+
+    python -m bench.seed --scale medium --truncate --anchor-date 2026-01-01
+
+The same --seed and --anchor-date always produce the same rows; dates are
+laid out around the anchor, which defaults to today. Pass the same anchor
+to bench.loadtest so its date ranges hit the same data. Appointments are
+streamed in with COPY so tens of millions of rows load in minutes.
+"""
+import io
+import random
+import argparse
+from datetime import date, timedelta
+
+from app.database import get_cursor
+from app.auth.auth import hash_password
+from app.maintenance.maintenance import (
+    ensure_partitions,
+    refresh_customer_directory
+)
+
+SEED_PASSWORD = "password123"
+
+SCALES = {
+    "small": {
+        "locations": 1, "staff": 20, "services": 30,
+        "users": 200, "appointments": 50_000
+    },
+    "medium": {
+        "locations": 3, "staff": 200, "services": 300,
+        "users": 5_000, "appointments": 2_000_000
+    },
+    "large": {
+        "locations": 10, "staff": 2_000, "services": 3_000,
+        "users": 20_000, "appointments": 20_000_000
+    }
+}
+
+HISTORY_DAYS = 730
+FUTURE_DAYS = 90
+COPY_CHUNK = 100_000
+
+FIRST_NAMES = [
+    "Aarav", "Priya", "Olivia", "Liam", "Sofia", "Noah", "Ananya", "Emma",
+    "Rohan", "Mia", "Arjun", "Isla", "Kavya", "Lucas", "Zara", "Ethan",
+    "Meera", "Amelia", "Vihaan", "Chloe", "Ishaan", "Grace", "Diya", "Leo"
+]
+LAST_NAMES = [
+    "Sharma", "Smith", "Patel", "Jones", "Khan", "Brown", "Iyer", "Taylor",
+    "Singh", "Wilson", "Gupta", "Davies", "Reddy", "Evans", "Nair", "Walker"
+]
+STAFF_ROLES = ["Stylist", "Senior Stylist", "Colourist", "Barber", "Therapist"]
+SERVICE_CATALOG = [
+    ("Trim", 15, "Hair"), ("Haircut", 30, "Hair"), ("Blow Dry", 45, "Hair"),
+    ("Full Colour", 180, "Colour"), ("Highlights", 150, "Colour"),
+    ("Root Touch-up", 90, "Colour"), ("Beard Trim", 15, "Grooming"),
+    ("Shave", 30, "Grooming"), ("Manicure", 45, "Nails"),
+    ("Pedicure", 60, "Nails"), ("Facial", 60, "Skin"), ("Massage", 90, "Spa")
+]
+
+# Saturday-heavy week, quiet Sunday (Monday first)
+WEEKDAY_WEIGHTS = [0.8, 0.9, 1.0, 1.1, 1.3, 1.6, 0.5]
+# 09:00 - 17:00 start hours, busiest around lunch and after work
+HOUR_WEIGHTS = [3, 5, 6, 8, 7, 5, 6, 8, 6]
+PAST_STATUSES = (["COMPLETED", "NO_SHOW", "CANCELLED"], [80, 5, 15])
+FUTURE_STATUSES = (["BOOKED", "CONFIRMED", "CANCELLED"], [70, 20, 10])
+
+# ---------------- HELPERS ----------------
+def copy_rows(cur, table: str, columns: list, rows):
+    """COPY an iterable of tuples into `table`, COPY_CHUNK rows at a time."""
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(
+            r"\N" if value is None else str(value) for value in row
+        ))
+        buffer.write("\n")
+        count += 1
+        if count % COPY_CHUNK == 0:
+            buffer.seek(0)
+            cur.copy_expert(statement, buffer)
+            buffer = io.StringIO()
+    buffer.seek(0)
+    cur.copy_expert(statement, buffer)
+    return count
+
+def truncate(cur):
+    cur.execute(
+        """
+        TRUNCATE locations, users, staff, services, appointments,
+                 appointment_series, appointment_rollups,
+                 reminder_deliveries, audit_log, customer_directory
+        RESTART IDENTITY CASCADE
+        """
+    )
+
+def ids_by_location(cur, table: str, location_ids: list):
+    cur.execute(
+        f"SELECT id, location_id FROM {table} "
+        "WHERE location_id = ANY(%s) ORDER BY id",
+        (location_ids,)
+    )
+    grouped = {}
+    for row in cur.fetchall():
+        grouped.setdefault(row["location_id"], []).append(row["id"])
+    return grouped
+
+# ---------------- GENERATORS ----------------
+def seed_locations(cur, count: int):
+    """Insert `count` branches and return their ids; without --truncate
+    existing locations keep theirs, so the new ids need not start at 1."""
+    cur.execute(
+        """
+        INSERT INTO locations (name)
+        SELECT 'Branch ' || i FROM generate_series(1, %s) AS i
+        ORDER BY i
+        RETURNING id
+        """,
+        (count,)
+    )
+    return sorted(row["id"] for row in cur.fetchall())
+
+def seed_staff(cur, rng, count: int, locations: list):
+    copy_rows(cur, "staff", ["name", "role", "location_id"], (
+        (
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            rng.choice(STAFF_ROLES),
+            locations[i % len(locations)]
+        )
+        for i in range(count)
+    ))
+
+def seed_services(cur, count: int, locations: list):
+    copy_rows(
+        cur,
+        "services",
+        ["name", "duration_minutes", "category", "location_id"],
+        (
+            (
+                f"{SERVICE_CATALOG[i % len(SERVICE_CATALOG)][0]} "
+                f"{i // len(SERVICE_CATALOG) + 1}",
+                SERVICE_CATALOG[i % len(SERVICE_CATALOG)][1],
+                SERVICE_CATALOG[i % len(SERVICE_CATALOG)][2],
+                locations[i % len(locations)]
+            )
+            for i in range(count)
+        )
+    )
+
+def seed_users(cur, count: int, locations: list):
+    """admin{n}@seed.local for the n-th seeded location, then staff{i} and
+    user{i} logins; all share SEED_PASSWORD (hashed once, bcrypt is
+    deliberately slow)."""
+    hashed = hash_password(SEED_PASSWORD)
+
+    def rows():
+        for n, loc in enumerate(locations, start=1):
+            yield (f"Admin {n}", f"admin{n}@seed.local", hashed, "ADMIN", loc)
+        for i in range(count):
+            role = "STAFF" if i % 10 == 0 else "CUSTOMER"
+            prefix = "staff" if role == "STAFF" else "user"
+            yield (
+                f"Seed User {i}",
+                f"{prefix}{i}@seed.local",
+                hashed,
+                role,
+                locations[i % len(locations)]
+            )
+
+    copy_rows(
+        cur,
+        "users",
+        ["name", "email", "password", "role", "location_id"],
+        rows()
+    )
+
+def appointment_rows(rng, count: int, staff: dict, services: dict, anchor: date):
+    today = anchor
+    locations = sorted(staff)
+    # the first branch is the busy one
+    location_weights = [3 if loc == locations[0] else 1 for loc in locations]
+    max_weight = max(WEEKDAY_WEIGHTS)
+    # ~10k distinct names: first, middle initial, last
+    customers = [
+        (f"{first} {initial}. {last}", f"{first}.{initial}.{last}@example.com".lower())
+        for initial in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        for first in FIRST_NAMES
+        for last in LAST_NAMES
+    ]
+
+    produced = 0
+    while produced < count:
+        if rng.random() < 0.2:
+            day = today + timedelta(days=int(rng.triangular(1, FUTURE_DAYS, 1)))
+            statuses = FUTURE_STATUSES
+        else:
+            day = today - timedelta(days=int(rng.triangular(0, HISTORY_DAYS, 0)))
+            statuses = PAST_STATUSES
+        if rng.random() * max_weight > WEEKDAY_WEIGHTS[day.weekday()]:
+            continue
+
+        loc = rng.choices(locations, location_weights)[0]
+        hour = 9 + rng.choices(range(len(HOUR_WEIGHTS)), HOUR_WEIGHTS)[0]
+        # regulars: a small share of customers makes most of the bookings
+        name, email = customers[int(len(customers) * rng.random() ** 3)]
+
+        yield (
+            loc,
+            name,
+            email if rng.random() < 0.7 else None,
+            rng.choice(staff[loc]),
+            rng.choice(services[loc]),
+            day,
+            f"{hour:02d}:{rng.choice([0, 15, 30, 45]):02d}",
+            rng.choices(*statuses)[0]
+        )
+        produced += 1
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--appointments", type=int,
+                        help="override the appointment count for the scale")
+    parser.add_argument("--truncate", action="store_true",
+                        help="empty the tables first (required for repeatable ids)")
+    parser.add_argument("--anchor-date", type=date.fromisoformat,
+                        default=date.today(),
+                        help="YYYY-MM-DD the history and bookings are laid "
+                             "out around (default: today)")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    if args.appointments is not None:
+        scale["appointments"] = args.appointments
+    rng = random.Random(args.seed)
+
+    conn, cur = get_cursor()
+    if args.truncate:
+        truncate(cur)
+
+    ensure_partitions(
+        cur,
+        months_ahead=FUTURE_DAYS // 30 + 1,
+        months_back=HISTORY_DAYS // 30 + 1,
+        today=args.anchor_date
+    )
+
+    location_ids = seed_locations(cur, scale["locations"])
+    seed_staff(cur, rng, scale["staff"], location_ids)
+    seed_services(cur, scale["services"], location_ids)
+    seed_users(cur, scale["users"], location_ids)
+    conn.commit()
+    print(f"seeded {scale['locations']} locations, {scale['staff']} staff, "
+          f"{scale['services']} services, {scale['users']} users")
+
+    staff = ids_by_location(cur, "staff", location_ids)
+    services = ids_by_location(cur, "services", location_ids)
+    # the directory is rebuilt once below instead of after every COPY chunk
+    cur.execute("ALTER TABLE appointments DISABLE TRIGGER USER")
+    count = copy_rows(
+        cur,
+        "appointments",
+        ["location_id", "customer_name", "customer_email", "staff_id",
+         "service_id", "appointment_date", "appointment_time", "status"],
+        appointment_rows(
+            rng, scale["appointments"], staff, services, args.anchor_date
+        )
+    )
+    cur.execute("ALTER TABLE appointments ENABLE TRIGGER USER")
+    conn.commit()
+    print(f"seeded {count} appointments around {args.anchor_date}")
+
+    refresh_customer_directory(cur)
+    cur.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    main()
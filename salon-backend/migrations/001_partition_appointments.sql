@@ -0,0 +1,77 @@
+-- Range-partition appointments by appointment_date (one partition per month).
+-- Existing rows are copied into monthly partitions; new partitions are
+-- created ahead of time by app.maintenance.maintenance.ensure_partitions.
+
+BEGIN;
+
+ALTER TABLE appointments RENAME TO appointments_legacy;
+
+CREATE TABLE appointments (
+    LIKE appointments_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (appointment_date);
+
+-- the partition key has to be part of the primary key
+ALTER TABLE appointments ADD PRIMARY KEY (id, appointment_date);
+ALTER TABLE appointments
+    ADD FOREIGN KEY (staff_id) REFERENCES staff (id),
+    ADD FOREIGN KEY (service_id) REFERENCES services (id);
+
+CREATE INDEX idx_appointments_date_time
+    ON appointments (appointment_date, appointment_time);
+CREATE INDEX idx_appointments_staff_date
+    ON appointments (staff_id, appointment_date);
+CREATE INDEX idx_appointments_id ON appointments (id);
+
+-- monthly partitions from the oldest appointment up to three months ahead
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := date_trunc('month', CURRENT_DATE + INTERVAL '3 months')::DATE;
+BEGIN
+    SELECT date_trunc('month', COALESCE(MIN(appointment_date), CURRENT_DATE))::DATE
+    INTO month_start
+    FROM appointments_legacy;
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF appointments FOR VALUES FROM (%L) TO (%L)',
+            'appointments_p' || to_char(month_start, 'YYYYMM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::DATE
+        );
+        month_start := (month_start + INTERVAL '1 month')::DATE;
+    END LOOP;
+END $$;
+
+-- catches bookings beyond the pre-created range until the next maintenance run
+CREATE TABLE appointments_default PARTITION OF appointments DEFAULT;
+
+INSERT INTO appointments SELECT * FROM appointments_legacy;
+
+-- keep the id sequence alive when the legacy table is dropped
+ALTER SEQUENCE appointments_id_seq OWNED BY appointments.id;
+DROP TABLE appointments_legacy;
+
+-- per-day counts for partitions that have been archived
+CREATE TABLE appointment_rollups (
+    appointment_date DATE NOT NULL,
+    staff_id INT NOT NULL,
+    service_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total_appointments INT NOT NULL,
+    PRIMARY KEY (appointment_date, staff_id, service_id, status)
+);
+
+-- reports read from this view so archived months keep answering
+CREATE VIEW appointment_counts AS
+    SELECT appointment_date, staff_id, service_id, status,
+           1 AS total_appointments
+    FROM appointments
+    UNION ALL
+    SELECT appointment_date, staff_id, service_id, status,
+           total_appointments
+    FROM appointment_rollups;
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Audit trail written in batches by app.audit.audit.AuditWriter.
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id BIGSERIAL PRIMARY KEY,
+    occurred_at TIMESTAMP NOT NULL,
+    user_id INT,
+    action VARCHAR(20) NOT NULL,
+    entity VARCHAR(50) NOT NULL,
+    entity_id INT,
+    detail JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_entity
+    ON audit_log (entity, entity_id, occurred_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_user
+    ON audit_log (user_id, occurred_at);
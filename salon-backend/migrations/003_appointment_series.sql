@@ -0,0 +1,21 @@
+-- Recurring appointment series; occurrences are ordinary appointments
+-- rows linked back through series_id.
+
+CREATE TABLE IF NOT EXISTS appointment_series (
+    id SERIAL PRIMARY KEY,
+    customer_name VARCHAR(100) NOT NULL,
+    staff_id INT NOT NULL REFERENCES staff (id),
+    service_id INT NOT NULL REFERENCES services (id),
+    appointment_time TIME NOT NULL,
+    interval_weeks INT NOT NULL CHECK (interval_weeks > 0),
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE appointments
+    ADD COLUMN IF NOT EXISTS series_id INT REFERENCES appointment_series (id);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_series_date
+    ON appointments (series_id, appointment_date)
+    WHERE series_id IS NOT NULL;
@@ -0,0 +1,18 @@
+-- Contact address for reminders and a dedup record per appointment/day.
+-- status: SENDING (claimed by a run), SENT, FAILED (temporary error,
+-- retried next run) or REJECTED (permanent error, never retried).
+-- attempts counts delivery attempts across every run.
+
+ALTER TABLE appointments
+    ADD COLUMN IF NOT EXISTS customer_email VARCHAR(255);
+
+CREATE TABLE IF NOT EXISTS reminder_deliveries (
+    appointment_id INT NOT NULL,
+    appointment_date DATE NOT NULL,
+    transport VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'SENDING',
+    attempts INT NOT NULL DEFAULT 0,
+    claimed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    sent_at TIMESTAMP,
+    PRIMARY KEY (appointment_id, appointment_date)
+);
@@ -0,0 +1,64 @@
+-- Multi-location support: every core table carries location_id and the
+-- hot indexes lead with it so each branch only touches its own entries.
+-- Existing data is assigned to location 1.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS locations (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+INSERT INTO locations (id, name) VALUES (1, 'Main')
+ON CONFLICT (id) DO NOTHING;
+SELECT setval('locations_id_seq', GREATEST((SELECT MAX(id) FROM locations), 1));
+
+ALTER TABLE users
+    ADD COLUMN location_id INT NOT NULL DEFAULT 1 REFERENCES locations (id);
+ALTER TABLE staff
+    ADD COLUMN location_id INT NOT NULL DEFAULT 1 REFERENCES locations (id);
+ALTER TABLE services
+    ADD COLUMN location_id INT NOT NULL DEFAULT 1 REFERENCES locations (id);
+ALTER TABLE appointments
+    ADD COLUMN location_id INT NOT NULL DEFAULT 1 REFERENCES locations (id);
+ALTER TABLE appointment_series
+    ADD COLUMN location_id INT NOT NULL DEFAULT 1 REFERENCES locations (id);
+ALTER TABLE appointment_rollups
+    ADD COLUMN location_id INT NOT NULL DEFAULT 1;
+ALTER TABLE audit_log
+    ADD COLUMN location_id INT;
+
+CREATE INDEX idx_staff_location ON staff (location_id, id) WHERE is_active;
+CREATE INDEX idx_services_location ON services (location_id, id) WHERE is_active;
+CREATE INDEX idx_users_location ON users (location_id, id);
+CREATE INDEX idx_series_location ON appointment_series (location_id, id);
+
+-- replace the global appointment indexes with location-led ones
+DROP INDEX IF EXISTS idx_appointments_date_time;
+DROP INDEX IF EXISTS idx_appointments_staff_date;
+CREATE INDEX idx_appointments_location_date_time
+    ON appointments (location_id, appointment_date, appointment_time);
+CREATE INDEX idx_appointments_location_staff_date
+    ON appointments (location_id, staff_id, appointment_date);
+CREATE INDEX idx_appointments_location_id
+    ON appointments (location_id, id);
+
+-- rollups are partitioned by location
+ALTER TABLE appointment_rollups DROP CONSTRAINT appointment_rollups_pkey;
+ALTER TABLE appointment_rollups ADD PRIMARY KEY
+    (location_id, appointment_date, staff_id, service_id, status);
+
+DROP VIEW appointment_counts;
+CREATE VIEW appointment_counts AS
+    SELECT location_id, appointment_date, staff_id, service_id, status,
+           1 AS total_appointments
+    FROM appointments
+    UNION ALL
+    SELECT location_id, appointment_date, staff_id, service_id, status,
+           total_appointments
+    FROM appointment_rollups;
+
+CREATE INDEX idx_audit_log_location ON audit_log (location_id, occurred_at);
+
+COMMIT;
@@ -0,0 +1,51 @@
+-- Customer typeahead: one row per (location, customer_name) with the latest
+-- appointment and most-booked staff member, searched through a trigram
+-- index. Refreshed by app.maintenance.maintenance.refresh_customer_directory.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+CREATE MATERIALIZED VIEW customer_directory AS
+WITH staff_visits AS (
+    SELECT location_id, customer_name, staff_id, COUNT(*) AS visits
+    FROM appointments
+    WHERE status <> 'CANCELLED'
+    GROUP BY location_id, customer_name, staff_id
+),
+preferred AS (
+    SELECT DISTINCT ON (location_id, customer_name)
+           location_id, customer_name, staff_id,
+           SUM(visits) OVER (PARTITION BY location_id, customer_name) AS visits
+    FROM staff_visits
+    ORDER BY location_id, customer_name, visits DESC, staff_id
+),
+latest AS (
+    SELECT DISTINCT ON (location_id, customer_name)
+           location_id, customer_name, id, appointment_date,
+           appointment_time, service_id, status
+    FROM appointments
+    ORDER BY location_id, customer_name,
+             appointment_date DESC, appointment_time DESC
+)
+SELECT l.location_id,
+       l.customer_name,
+       COALESCE(p.visits, 0) AS visits,
+       l.id AS last_appointment_id,
+       l.appointment_date AS last_appointment_date,
+       l.appointment_time AS last_appointment_time,
+       l.service_id AS last_service_id,
+       l.status AS last_status,
+       p.staff_id AS preferred_staff_id
+FROM latest l
+LEFT JOIN preferred p
+  ON p.location_id = l.location_id AND p.customer_name = l.customer_name;
+
+-- required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX idx_customer_directory_key
+    ON customer_directory (location_id, customer_name);
+-- short prefixes, which trigrams handle poorly
+CREATE INDEX idx_customer_directory_prefix
+    ON customer_directory (location_id, lower(customer_name) text_pattern_ops);
+-- fuzzy matching and longer prefixes
+CREATE INDEX idx_customer_directory_trgm
+    ON customer_directory USING GIN (location_id, customer_name gin_trgm_ops);
@@ -0,0 +1,14 @@
+-- Background reminder runs started from POST /reminders/dispatch; any
+-- worker can report on a run by id.
+
+CREATE TABLE IF NOT EXISTS reminder_runs (
+    id SERIAL PRIMARY KEY,
+    location_id INT REFERENCES locations (id),
+    appointment_date DATE NOT NULL,
+    transport VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'RUNNING',
+    result JSONB,
+    error TEXT,
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMP
+);
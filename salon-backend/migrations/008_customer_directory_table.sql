@@ -0,0 +1,168 @@
+-- Keep the customer typeahead current: customer_directory becomes a table
+-- whose rows are recomputed for the customers touched by every insert,
+-- update or delete on appointments. Statement-level triggers see all the
+-- rows of a statement at once, so a bulk insert recomputes each customer
+-- once rather than once per row.
+
+-- same columns and rows as the materialized view it replaces
+CREATE TABLE customer_directory_new AS SELECT * FROM customer_directory;
+DROP MATERIALIZED VIEW customer_directory;
+ALTER TABLE customer_directory_new RENAME TO customer_directory;
+
+ALTER TABLE customer_directory
+    ADD PRIMARY KEY (location_id, customer_name);
+-- short prefixes, which trigrams handle poorly
+CREATE INDEX idx_customer_directory_prefix
+    ON customer_directory (location_id, lower(customer_name) text_pattern_ops);
+-- fuzzy matching and longer prefixes
+CREATE INDEX idx_customer_directory_trgm
+    ON customer_directory USING GIN (location_id, customer_name gin_trgm_ops);
+
+-- one customer's appointments, for the per-customer recompute below
+CREATE INDEX IF NOT EXISTS idx_appointments_location_customer
+    ON appointments (location_id, customer_name);
+
+-- Recompute the directory rows of the given (location, customer) pairs;
+-- pairs with no appointments left are removed.
+--
+-- Two transactions booking the same customer would each recompute from a
+-- snapshot missing the other's row, so the last upsert would be wrong.
+-- Each customer first takes a transaction-scoped advisory lock, and the
+-- recompute runs as a separate statement with a fresh snapshot that
+-- sees whatever the previous lock holder committed. Customers are hashed
+-- into 256 buckets so a full rebuild takes at most 256 locks; they are
+-- taken in order to avoid deadlocks.
+CREATE OR REPLACE FUNCTION refresh_customer_directory_rows(
+    location_ids INT[],
+    customer_names TEXT[]
+) RETURNS void LANGUAGE sql AS $$
+    SELECT pg_advisory_xact_lock(hashtext('customer_directory'), bucket)
+    FROM (
+        SELECT DISTINCT hashtext(location_id || ':' || customer_name) & 255
+               AS bucket
+        FROM unnest(location_ids, customer_names) AS k(location_id, customer_name)
+        ORDER BY 1
+    ) buckets;
+
+    WITH keys AS (
+        SELECT DISTINCT location_id, customer_name
+        FROM unnest(location_ids, customer_names) AS k(location_id, customer_name)
+    ),
+    customer_appointments AS (
+        SELECT a.*
+        FROM appointments a
+        JOIN keys k
+          ON a.location_id = k.location_id
+         AND a.customer_name = k.customer_name
+    ),
+    staff_visits AS (
+        SELECT location_id, customer_name, staff_id, COUNT(*) AS visits
+        FROM customer_appointments
+        WHERE status <> 'CANCELLED'
+        GROUP BY location_id, customer_name, staff_id
+    ),
+    preferred AS (
+        SELECT DISTINCT ON (location_id, customer_name)
+               location_id, customer_name, staff_id,
+               SUM(visits) OVER (PARTITION BY location_id, customer_name) AS visits
+        FROM staff_visits
+        ORDER BY location_id, customer_name, visits DESC, staff_id
+    ),
+    latest AS (
+        SELECT DISTINCT ON (location_id, customer_name)
+               location_id, customer_name, id, appointment_date,
+               appointment_time, service_id, status
+        FROM customer_appointments
+        ORDER BY location_id, customer_name,
+                 appointment_date DESC, appointment_time DESC
+    ),
+    fresh AS (
+        SELECT l.location_id,
+               l.customer_name,
+               COALESCE(p.visits, 0) AS visits,
+               l.id AS last_appointment_id,
+               l.appointment_date AS last_appointment_date,
+               l.appointment_time AS last_appointment_time,
+               l.service_id AS last_service_id,
+               l.status AS last_status,
+               p.staff_id AS preferred_staff_id
+        FROM latest l
+        LEFT JOIN preferred p
+          ON p.location_id = l.location_id AND p.customer_name = l.customer_name
+    ),
+    removed AS (
+        DELETE FROM customer_directory d
+        USING keys k
+        WHERE d.location_id = k.location_id
+          AND d.customer_name = k.customer_name
+          AND NOT EXISTS (
+              SELECT 1 FROM fresh f
+              WHERE f.location_id = k.location_id
+                AND f.customer_name = k.customer_name
+          )
+    )
+    INSERT INTO customer_directory
+    SELECT * FROM fresh
+    ON CONFLICT (location_id, customer_name) DO UPDATE
+    SET visits = EXCLUDED.visits,
+        last_appointment_id = EXCLUDED.last_appointment_id,
+        last_appointment_date = EXCLUDED.last_appointment_date,
+        last_appointment_time = EXCLUDED.last_appointment_time,
+        last_service_id = EXCLUDED.last_service_id,
+        last_status = EXCLUDED.last_status,
+        preferred_staff_id = EXCLUDED.preferred_staff_id;
+$$;
+
+-- transition tables allow only one event per trigger, hence three
+CREATE OR REPLACE FUNCTION sync_customer_directory_inserted()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM refresh_customer_directory_rows(
+        array_agg(location_id), array_agg(customer_name::text)
+    )
+    FROM (SELECT DISTINCT location_id, customer_name FROM new_rows) k;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_customer_directory_updated()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- old keys too, for renamed customers and moved appointments
+    PERFORM refresh_customer_directory_rows(
+        array_agg(location_id), array_agg(customer_name::text)
+    )
+    FROM (
+        SELECT location_id, customer_name FROM old_rows
+        UNION
+        SELECT location_id, customer_name FROM new_rows
+    ) k;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_customer_directory_deleted()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM refresh_customer_directory_rows(
+        array_agg(location_id), array_agg(customer_name::text)
+    )
+    FROM (SELECT DISTINCT location_id, customer_name FROM old_rows) k;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER customer_directory_on_insert
+    AFTER INSERT ON appointments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_customer_directory_inserted();
+
+CREATE TRIGGER customer_directory_on_update
+    AFTER UPDATE ON appointments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_customer_directory_updated();
+
+CREATE TRIGGER customer_directory_on_delete
+    AFTER DELETE ON appointments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_customer_directory_deleted();
@@ -0,0 +1,5 @@
+-- A series cancelled from its first occurrence keeps its dates and is
+-- marked CANCELLED instead of getting an end_date before its start_date.
+
+ALTER TABLE appointment_series
+    ADD COLUMN IF NOT EXISTS status VARCHAR(20) NOT NULL DEFAULT 'ACTIVE';
@@ -0,0 +1,10 @@
+-- Each dispatch run stamps the rows it claims with its own token and only
+-- settles rows still holding it, so a run that outlives its claim cannot
+-- overwrite the run that took the rows over.
+
+ALTER TABLE reminder_deliveries
+    ADD COLUMN IF NOT EXISTS claim_token UUID;
+
+CREATE INDEX IF NOT EXISTS idx_reminder_deliveries_claim_token
+    ON reminder_deliveries (claim_token)
+    WHERE status = 'SENDING';
@@ -0,0 +1,161 @@
+"""SmtpTransport against an in-process SMTP server.
+
+    python -m pytest tests
+"""
+import asyncio
+import socketserver
+import threading
+
+import pytest
+
+from app.reminders.transports import PermanentDeliveryError, SmtpTransport
+
+# ---------------- SMTP STUB ----------------
+class SmtpStubHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib.send_message()."""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        self.reply("220 stub ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            command = line[:4].upper()
+
+            if command in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif command == "MAIL":
+                if server.transient_failures:
+                    server.transient_failures -= 1
+                    self.reply("451 try again later")
+                else:
+                    recipients = []
+                    self.reply("250 OK")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip().strip("<>")
+                if address in server.rejected:
+                    self.reply("550 no such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                body = []
+                while True:
+                    data = self.rfile.readline().decode()
+                    if data in (".\r\n", ".\n", ""):
+                        break
+                    body.append(data)
+                server.delivered.append((recipients, "".join(body)))
+                self.reply("250 queued")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+class SmtpStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SmtpStubHandler)
+        self.delivered = []
+        self.rejected = set()
+        self.transient_failures = 0
+
+@pytest.fixture
+def smtp_stub():
+    server = SmtpStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def transport(smtp_stub):
+    host, port = smtp_stub.server_address
+    return SmtpTransport(host=host, port=port, rate_limit=0)
+
+def make_message(to="ana@example.com"):
+    return {
+        "appointment_id": 1,
+        "to": to,
+        "subject": "Reminder: Haircut on 2026-01-02",
+        "body": "Hi Ana,\n\nSee you soon!"
+    }
+
+# ---------------- TESTS ----------------
+def test_delivers_message(smtp_stub, transport):
+    asyncio.run(transport.send(make_message()))
+
+    assert len(smtp_stub.delivered) == 1
+    recipients, body = smtp_stub.delivered[0]
+    assert recipients == ["ana@example.com"]
+    assert "Subject: Reminder: Haircut on 2026-01-02" in body
+    assert "See you soon!" in body
+
+def test_rejected_recipient_is_permanent(smtp_stub, transport):
+    smtp_stub.rejected.add("gone@example.com")
+
+    with pytest.raises(PermanentDeliveryError):
+        asyncio.run(transport.send(make_message("gone@example.com")))
+    assert smtp_stub.delivered == []
+
+def test_missing_recipient_is_permanent(smtp_stub, transport):
+    with pytest.raises(PermanentDeliveryError):
+        asyncio.run(transport.send(make_message(None)))
+
+def test_temporary_failure_is_retryable(smtp_stub, transport):
+    smtp_stub.transient_failures = 1
+
+    with pytest.raises(Exception) as excinfo:
+        asyncio.run(transport.send(make_message()))
+    assert not isinstance(excinfo.value, PermanentDeliveryError)
+
+    asyncio.run(transport.send(make_message()))
+    assert len(smtp_stub.delivered) == 1
+
+def test_dispatch_retries_until_delivered(smtp_stub, transport, monkeypatch):
+    # the dispatcher pulls in the web stack; skip where it isn't installed
+    pytest.importorskip("fastapi")
+    pytest.importorskip("psycopg2")
+    from app.reminders import reminders
+
+    monkeypatch.setattr(reminders, "REMINDER_RETRY_DELAY", 0)
+    monkeypatch.setattr(reminders, "REMINDER_MAX_RETRIES", 3)
+    smtp_stub.transient_failures = 2
+    semaphore = asyncio.Semaphore(1)
+
+    async def deliver():
+        return await reminders.deliver_with_retries(
+            transport, make_message(), semaphore
+        )
+
+    assert asyncio.run(deliver()) == (3, "SENT")
+    assert len(smtp_stub.delivered) == 1
+
+def test_dispatch_does_not_retry_rejections(smtp_stub, transport, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("psycopg2")
+    from app.reminders import reminders
+
+    monkeypatch.setattr(reminders, "REMINDER_RETRY_DELAY", 0)
+    smtp_stub.rejected.add("gone@example.com")
+    semaphore = asyncio.Semaphore(1)
+
+    async def deliver():
+        return await reminders.deliver_with_retries(
+            transport, make_message("gone@example.com"), semaphore
+        )
+
+    assert asyncio.run(deliver()) == (1, "REJECTED")
+    assert smtp_stub.delivered == []